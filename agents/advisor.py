@@ -1,19 +1,13 @@
-import os
-from dotenv import load_dotenv
-from langchain.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnableLambda
-from langchain.output_parsers import PydanticOutputParser
-from langchain_openai import ChatOpenAI
-from langchain_huggingface import HuggingFaceEndpoint
-from langchain_community.llms import Ollama
-from typing import List, Dict
+import json
+from typing import List, Dict, Iterator, Optional
 from pydantic import BaseModel, Field
-from agents.prompts import ADVISOR_PROMPT
+from agents.prompts import ADVISOR_PROMPT, ADVISOR_COMPLETE_PROMPT, get_template
+from agents.llm import get_llm
+from agents.cache import get_cache, cached_call, llm_identity, make_key
+from agents.tracing import traced, record, tracing_handler
+from agents.json_repair import loads_partial
+from agents.compaction import compact_events
 
-# Load environment variables
-load_dotenv()
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-HF_TOKEN = os.getenv("HUGGINGFACEHUB_API_TOKEN")  
 
 class AdvisorOutput(BaseModel):
     google_trends: int = Field(..., description="Google Trends score (0-100)")
@@ -23,38 +17,125 @@ class AdvisorOutput(BaseModel):
     recommendations: List[str] = Field(..., description="Actionable recommendations")
     conclusion: str = Field(..., description="High-level conclusion or summary")
 
-def get_advisor_output(company, events, debug=False):
+def default_llm():
+    return get_llm("advisor")
+
+def _parse_partial(text):
+    # (fields parsed so far, names of the fields still missing); truncated output is repaired first
+    try:
+        data, truncated = loads_partial(text)
+    except json.JSONDecodeError:
+        data, truncated = {}, False
+    if not isinstance(data, dict):
+        data = {}
+    if truncated and data:
+        # The member open at the cut was closed by the repair: it may be short (list, dict, number)
+        data.pop(list(data)[-1])
+    data = {k: v for k, v in data.items() if k in AdvisorOutput.model_fields and v not in (None, "", [], {})}
+    risks = data.get("risks_and_opportunities")
+    if risks is not None and not (isinstance(risks, dict) and risks.get("risks") and risks.get("opportunities")):
+        del data["risks_and_opportunities"]  # the report reads both keys
+    return data, [name for name in AdvisorOutput.model_fields if name not in data]
+
+def _parse_fields(text):
+    # cached_call parser: any answer with at least one usable field is worth keeping
+    data, _ = _parse_partial(text)
+    if not data:
+        raise ValueError(f"No advisor fields in output: {text[:200]!r}")
+    return data
+
+def parse_advisor_text(text) -> Optional[AdvisorOutput]:
+    data, missing = _parse_partial(text)
+    if missing:
+        return None
+    try:
+        return AdvisorOutput(**data)
+    except Exception:
+        return None
+
+def _complete(llm, prompt_text, data, cache=None):
+    # Re-prompt only for the fields a truncated answer is missing, then merge both halves
+    missing = [name for name in AdvisorOutput.model_fields if name not in data]
+    if missing:
+        record(repair_calls=1)
+        completion = ADVISOR_COMPLETE_PROMPT.format(
+            prompt=prompt_text,
+            partial_json=json.dumps(data, ensure_ascii=False),
+            missing_fields=", ".join(missing),
+        )
+        data = {**data, **cached_call(llm, completion, _parse_fields, cache)}
+    return AdvisorOutput(**data)
+
+def advisor_prompt(company, events, llm, cache=None, debug_info=None):
+    # Compacted events (no nulls, capped summaries, per-type digests over budget) in ADVISOR_PROMPT
+    events_json, _ = compact_events(company, events, llm=llm, cache=cache, debug_info=debug_info)
+    return get_template(ADVISOR_PROMPT).format(company=company, events_json=events_json)
+
+def complete_advisor_text(company, events, text, debug_info=None, llm=None, use_cache=True) -> Optional[AdvisorOutput]:
+    # For a streamed answer that did not parse: ask only for its missing fields
+    debug_info = {} if debug_info is None else debug_info
+    if llm is None:
+        llm = default_llm()
+    cache = get_cache() if use_cache else None
+    try:
+        prompt_text = advisor_prompt(company, events, llm, cache)
+        return _complete(llm, prompt_text, _parse_partial(text)[0], cache)
+    except Exception as e:
+        debug_info["Advisor Parse Error"] = str(e)
+        record(parse_errors=1)
+        return None
+
+@traced("get_advisor_output")
+def get_advisor_output(company, events, debug=False, llm=None, use_cache=True):
+    from langchain_core.runnables import RunnableLambda
     debug_info = {}
-    # llm = Ollama(model="mistral")
-    # llm = HuggingFaceEndpoint(
-    #     repo_id="HuggingFaceH4/zephyr-7b-beta",
-    #     temperature=0.3,
-    #     max_new_tokens=1024,
-    #     huggingfacehub_api_token=HF_TOKEN,
-    # )
-    llm = ChatOpenAI(
-        model="gpt-4o-mini",
-        temperature=0.3,
-        openai_api_key=OPENAI_API_KEY,
-        max_tokens=2048
-    )
-    events_json = [ev.dict() for ev in events]  # Pydantic Event objects -> dict
-    prompt = ChatPromptTemplate.from_template(ADVISOR_PROMPT)
-    parser = PydanticOutputParser(pydantic_object=AdvisorOutput)
+    cache = get_cache() if use_cache else None
+    if llm is None:
+        llm = default_llm()
 
     # Compose la chaîne advisor
     chain = (
-        RunnableLambda(lambda x: prompt.format(company=x["company"], events_json=x["events_json"]))
-        | llm
-        | RunnableLambda(lambda x: x.content if hasattr(x, "content") else x)
-        | parser
+        RunnableLambda(lambda x: advisor_prompt(x["company"], x["events"], llm, cache, debug_info))
+        | RunnableLambda(lambda p: _complete(llm, p, cached_call(llm, p, _parse_fields, cache), cache))
     )
 
     try:
-        result = chain.invoke({"company": company, "events_json": events_json})
+        result = chain.invoke({"company": company, "events": events})
         if debug:
             debug_info["Advisor Chain Result"] = str(result)
+            if cache is not None:
+                debug_info["LLM Cache"] = str(cache.stats())
         return result, debug_info
     except Exception as e:
         debug_info["Advisor Parse Error"] = str(e)
+        record(parse_errors=1)
         return None, debug_info
+
+# Streaming: yield the advisor completion text as it is generated, parse it once complete
+@traced("get_advisor_output")
+def stream_advisor_text(company, events, debug_info=None, llm=None, use_cache=True) -> Iterator[str]:
+    debug_info = {} if debug_info is None else debug_info
+    cache = get_cache() if use_cache else None
+    if llm is None:
+        llm = default_llm()
+    prompt_text = advisor_prompt(company, events, llm, cache, debug_info)
+
+    model, temperature = llm_identity(llm)
+    key = make_key(prompt_text, model, temperature)
+    cached = cache.get(key) if cache is not None else None
+    if cache is not None:
+        record(**{"cache_hits" if cached is not None else "cache_misses": 1})
+    if cached is not None:
+        yield cached
+        return
+    text = ""
+    for chunk in llm.stream(prompt_text, config={"callbacks": [tracing_handler]}):
+        chunk = chunk.content if hasattr(chunk, "content") else chunk
+        text += chunk
+        yield chunk
+    # Only complete answers are cached; truncated ones go through complete_advisor_text
+    if parse_advisor_text(text) is not None:
+        if cache is not None:
+            cache.set(key, text)
+    else:
+        debug_info["Advisor Parse Error"] = "Incomplete advisor output"
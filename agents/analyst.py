@@ -1,20 +1,22 @@
 import os
-from dotenv import load_dotenv
-from langchain.prompts import ChatPromptTemplate
+import json
+import asyncio
 from langchain_core.documents import Document
-from langchain_core.runnables import RunnableLambda, RunnableSequence
-from langchain.output_parsers import PydanticOutputParser
-from langchain_openai import ChatOpenAI
-from langchain_huggingface import HuggingFaceEndpoint
-from langchain_community.llms import Ollama
-from typing import Optional, List
+from typing import Optional, List, Iterator
 from pydantic import BaseModel, Field
-from agents.prompts import ANALYST_PROMPT
+from agents.prompts import ANALYST_PROMPT, ANALYST_CONTINUE_PROMPT, get_template
+from agents.llm import get_llm
+from agents.cache import get_cache, cached_call, acached_call, llm_identity, make_key
+from agents.streaming import EventArrayParser
+from agents.json_repair import loads_partial, recover_array_items
+from agents.tokens import count_tokens
+from agents.tracing import traced, record, tracing_handler
 
-# Load environment variables
-load_dotenv()
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-HF_TOKEN = os.getenv("HUGGINGFACEHUB_API_TOKEN")  
+MAX_CONTEXT_TOKENS = int(os.getenv("ANALYST_MAX_CONTEXT_TOKENS", "6000"))  # per extraction call
+MAX_CONCURRENCY = int(os.getenv("ANALYST_MAX_CONCURRENCY", "8"))  # parallel LLM calls
+CALL_TIMEOUT = float(os.getenv("ANALYST_CALL_TIMEOUT", "60"))  # seconds per LLM call
+MAX_RETRIES = int(os.getenv("ANALYST_MAX_RETRIES", "2"))
+MAX_REPAIR_ROUNDS = int(os.getenv("ANALYST_MAX_REPAIR_ROUNDS", "1"))  # continuation calls for truncated output
 
 # MODELS
 class Event(BaseModel):
@@ -31,6 +33,7 @@ class Event(BaseModel):
     competitors: Optional[str] = Field(default=None)
     summary: str = Field(description="Long summary of the event")
     source_url: str = Field(description="URL of the article where the event was found")
+    source_urls: List[str] = Field(default_factory=list, description="All article URLs reporting the event (set by deduplication)")
 
 class AnalystOutput(BaseModel):
     events: List[Event]
@@ -42,26 +45,134 @@ def docs_to_context(docs: List[Document]) -> str:
         context += f"Title: {meta.get('title')}\nDate: {meta.get('date','')}\nContent: {doc.page_content}\nSource: {meta.get('url')}\n\n"
     return context
 
+def default_llm():
+    return get_llm("analyst")
+
+# CHUNKING (map-reduce over token-budgeted batches)
+def split_document(doc: Document, max_tokens: int) -> List[Document]:
+    # Split an article that alone exceeds the budget into paragraph-aligned parts
+    if count_tokens(docs_to_context([doc])) <= max_tokens:
+        return [doc]
+    overhead = count_tokens(docs_to_context([Document(page_content="", metadata=doc.metadata)]))
+    budget = max(max_tokens - overhead, 1)
+    pieces = []
+    for para in doc.page_content.split("\n"):
+        if count_tokens(para) <= budget:
+            pieces.append(para)
+        else:
+            step = budget * 4  # hard split of oversized paragraphs, ~4 chars/token
+            pieces.extend(para[i:i + step] for i in range(0, len(para), step))
+    parts, current, current_tokens = [], [], 0
+    for piece in pieces:
+        piece_tokens = count_tokens(piece) + 1
+        if current and current_tokens + piece_tokens > budget:
+            parts.append("\n".join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += piece_tokens
+    if current:
+        parts.append("\n".join(current))
+    return [
+        Document(page_content=part, metadata={**doc.metadata, "part": i + 1, "parts": len(parts)})
+        for i, part in enumerate(parts)
+    ]
+
+def batch_documents(docs: List[Document], max_tokens: int) -> List[List[Document]]:
+    # Greedily pack documents (or article parts) into batches whose context fits max_tokens
+    batches, current, current_tokens = [], [], 0
+    for doc in docs:
+        for part in split_document(doc, max_tokens):
+            part_tokens = count_tokens(docs_to_context([part]))
+            if current and current_tokens + part_tokens > max_tokens:
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(part)
+            current_tokens += part_tokens
+    if current:
+        batches.append(current)
+    return batches
+
+def merge_outputs(outputs: List[AnalystOutput]) -> AnalystOutput:
+    # Reduce step: concatenate batch results, dropping events repeated across parts of one article
+    seen = set()
+    events = []
+    for output in outputs:
+        for ev in output.events:
+            key = (ev.type, ev.title.strip().lower(), ev.source_url)
+            if key in seen:
+                continue
+            seen.add(key)
+            events.append(ev)
+    return AnalystOutput(events=events)
+
+# TOLERANT PARSING
+def parse_analyst_text(text):
+    # Returns (AnalystOutput, truncated): fences, comments and trailing commas are repaired,
+    # valid events are kept from a cut-off array and invalid ones skipped
+    items, truncated = recover_array_items(text)
+    # A cut-off array keeps only its closed objects: the repaired last one may be missing fields
+    if not truncated:
+        try:
+            data, cut = loads_partial(text)
+            if isinstance(data, dict):
+                items = data.get("events", [])
+            elif cut:
+                items, truncated = data[:-1], True  # bare array: its last item may be short
+            else:
+                items = data
+        except (json.JSONDecodeError, AttributeError):
+            if not items:
+                raise ValueError(f"No JSON found in analyst output: {text[:200]!r}")
+    events = []
+    for item in items if isinstance(items, list) else []:
+        try:
+            events.append(Event(**item))
+        except Exception:
+            continue
+    return AnalystOutput(events=events), truncated
+
+def _continuation_prompt(prompt_text, output):
+    titles = "\n".join(f"- {ev.title}" for ev in output.events) or "- (none)"
+    return ANALYST_CONTINUE_PROMPT.format(prompt=prompt_text, titles=titles)
+
+def complete_events(llm, prompt_text, parsed, cache=None, max_rounds=MAX_REPAIR_ROUNDS):
+    # Re-prompt only for the events missing from a truncated answer
+    output, truncated = parsed
+    for _ in range(max_rounds):
+        if not truncated:
+            break
+        record(repair_calls=1)
+        more, truncated = cached_call(llm, _continuation_prompt(prompt_text, output), parse_analyst_text, cache)
+        merged = merge_outputs([output, more])
+        if len(merged.events) == len(output.events):
+            break
+        output = merged
+    return output
+
+async def acomplete_events(llm, prompt_text, parsed, cache=None, max_rounds=MAX_REPAIR_ROUNDS):
+    output, truncated = parsed
+    for _ in range(max_rounds):
+        if not truncated:
+            break
+        record(repair_calls=1)
+        more, truncated = await acached_call(llm, _continuation_prompt(prompt_text, output), parse_analyst_text, cache)
+        merged = merge_outputs([output, more])
+        if len(merged.events) == len(output.events):
+            break
+        output = merged
+    return output
+
 # Full chain
-def extract_events(company, docs, debug=False):
+@traced("extract_events")
+def extract_events(company, docs, debug=False, llm=None, use_cache=True, max_context_tokens=MAX_CONTEXT_TOKENS):
     debug_info = {}
+    cache = get_cache() if use_cache else None
 
     # Compose chain: docs → context → prompt → LLM → parse
-    # llm = Ollama(model="mistral")
-    # llm = HuggingFaceEndpoint(
-    #         repo_id="HuggingFaceH4/zephyr-7b-beta",
-    #         temperature=0.1,
-    #         max_new_tokens=1024,
-    #         huggingfacehub_api_token=HF_TOKEN,
-    # )
-    llm = ChatOpenAI(
-        model="gpt-4o-mini",
-        temperature=0.1,
-        openai_api_key=OPENAI_API_KEY,
-        max_tokens=2048
-    )
-    prompt = ChatPromptTemplate.from_template(ANALYST_PROMPT)
-    parser = PydanticOutputParser(pydantic_object=AnalystOutput)
+    from langchain_core.runnables import RunnableLambda
+    if llm is None:
+        llm = default_llm()
+    prompt = get_template(ANALYST_PROMPT)
 
     # 1. docs → context string
     docs_to_context_step = RunnableLambda(lambda x: docs_to_context(x["docs"]))
@@ -69,25 +180,143 @@ def extract_events(company, docs, debug=False):
     # 2. context → prompt string
     prompt_step = RunnableLambda(lambda x: prompt.format(company=x["company"], context=x["context"]))
 
-    # 3. prompt → LLM output
-    # 4. LLM output → Pydantic parsing
+    # 3. prompt → LLM output (served from the on-disk cache when the prompt is unchanged)
+    # 4. LLM output → tolerant parsing, continuation call if the answer was cut off
 
     chain = (
         RunnableLambda(lambda x: {"company": x["company"], "docs": x["docs"]})
         | RunnableLambda(lambda x: {"company": x["company"], "context": docs_to_context(x["docs"])})
         | RunnableLambda(lambda x: prompt.format(company=x["company"], context=x["context"]))
-        | llm
-        | RunnableLambda(lambda x: x.content if hasattr(x, "content") else x)
-        | parser
+        | RunnableLambda(lambda p: complete_events(llm, p, cached_call(llm, p, parse_analyst_text, cache), cache))
     )
 
-    # Execution
-    result = None
-    try:
-        result = chain.invoke({"company": company, "docs": docs})
-        if debug:
-            debug_info["Analyst Chain Result"] = str(result)
-        return result, debug_info
-    except Exception as e:
-        debug_info["Analyst Parse Error"] = str(e)
-        return AnalystOutput(events=[]), debug_info
\ No newline at end of file
+    # Execution: a single call when the context fits, otherwise one call per batch + merge
+    if not max_context_tokens or count_tokens(docs_to_context(docs)) <= max_context_tokens:
+        batches = [docs]
+    else:
+        batches = batch_documents(docs, max_context_tokens)
+    if debug and len(batches) > 1:
+        debug_info["Analyst Batches"] = str([len(b) for b in batches])
+
+    outputs = []
+    for i, batch in enumerate(batches):
+        try:
+            outputs.append(chain.invoke({"company": company, "docs": batch}))
+        except Exception as e:
+            key = "Analyst Parse Error" if len(batches) == 1 else f"Analyst Parse Error (batch {i + 1})"
+            debug_info[key] = str(e)
+            record(parse_errors=1)
+    result = merge_outputs(outputs)
+    if debug:
+        debug_info["Analyst Chain Result"] = str(result)
+        if cache is not None:
+            debug_info["LLM Cache"] = str(cache.stats())
+    return result, debug_info
+
+# Concurrent chain: one LLM call per document, bounded parallelism
+@traced("extract_events")
+async def aextract_events(
+    company, docs, debug=False, llm=None, use_cache=True, max_context_tokens=MAX_CONTEXT_TOKENS,
+    concurrency=MAX_CONCURRENCY, timeout=CALL_TIMEOUT, retries=MAX_RETRIES, backoff=1.0,
+):
+    debug_info = {}
+    cache = get_cache() if use_cache else None
+    if llm is None:
+        llm = default_llm()
+    prompt = get_template(ANALYST_PROMPT)
+
+    # Each document (or part of an oversized article) becomes its own extraction call
+    units = []
+    for doc in docs:
+        units.extend(split_document(doc, max_context_tokens) if max_context_tokens else [doc])
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+    async def run_one(i, doc):
+        prompt_text = prompt.format(company=company, context=docs_to_context([doc]))
+        error = None
+        for attempt in range(retries + 1):
+            try:
+                async with semaphore:
+                    parsed = await asyncio.wait_for(
+                        acached_call(llm, prompt_text, parse_analyst_text, cache), timeout
+                    )
+                    return await asyncio.wait_for(acomplete_events(llm, prompt_text, parsed, cache), timeout)
+            except Exception as e:
+                error = e
+                if attempt < retries:
+                    record(retries=1)
+                    await asyncio.sleep(backoff * 2 ** attempt)
+        record(parse_errors=1)
+        debug_info[f"Analyst Parse Error (doc {i + 1})"] = f"{type(error).__name__}: {error}"
+        return None
+
+    outputs = await asyncio.gather(*(run_one(i, doc) for i, doc in enumerate(units)))
+    result = merge_outputs([o for o in outputs if o is not None])
+    if debug:
+        debug_info["Analyst Calls"] = str(len(units))
+        debug_info["Analyst Chain Result"] = str(result)
+        if cache is not None:
+            debug_info["LLM Cache"] = str(cache.stats())
+    return result, debug_info
+
+def extract_events_concurrent(company, docs, debug=False, **kwargs):
+    # Blocking entry point for callers without an event loop (Streamlit script, CLI)
+    return asyncio.run(aextract_events(company, docs, debug=debug, **kwargs))
+
+# Streaming chain: yield each Event as soon as its JSON object is complete
+@traced("extract_events")
+def stream_events(company, docs, debug_info=None, llm=None, use_cache=True, max_context_tokens=MAX_CONTEXT_TOKENS) -> Iterator[Event]:
+    debug_info = {} if debug_info is None else debug_info
+    cache = get_cache() if use_cache else None
+    if llm is None:
+        llm = default_llm()
+    prompt = get_template(ANALYST_PROMPT)
+    model, temperature = llm_identity(llm)
+
+    if not max_context_tokens or count_tokens(docs_to_context(docs)) <= max_context_tokens:
+        batches = [docs]
+    else:
+        batches = batch_documents(docs, max_context_tokens)
+
+    seen = set()
+    for i, batch in enumerate(batches):
+        prompt_text = prompt.format(company=company, context=docs_to_context(batch))
+        key = make_key(prompt_text, model, temperature)
+        cached = cache.get(key) if cache is not None else None
+        if cache is not None:
+            record(**{"cache_hits" if cached is not None else "cache_misses": 1})
+        # A cached completion is replayed as a single chunk
+        chunks = [cached] if cached is not None else (
+            c.content if hasattr(c, "content") else c
+            for c in llm.stream(prompt_text, config={"callbacks": [tracing_handler]})
+        )
+        items_parser = EventArrayParser()
+        text = ""
+        try:
+            for chunk in chunks:
+                text += chunk
+                for item in items_parser.feed(chunk):
+                    try:
+                        ev = Event(**item)
+                    except Exception as e:
+                        debug_info[f"Analyst Event Error (batch {i + 1})"] = str(e)
+                        continue
+                    key_ev = (ev.type, ev.title.strip().lower(), ev.source_url)
+                    if key_ev not in seen:
+                        seen.add(key_ev)
+                        yield ev
+            # Only parseable completions go to the cache, same as the blocking chain
+            parsed = parse_analyst_text(text)
+            if cache is not None and cached is None:
+                cache.set(key, text)
+            # Events the incremental parser could not read, plus a continuation if cut off
+            for ev in complete_events(llm, prompt_text, parsed, cache).events:
+                key_ev = (ev.type, ev.title.strip().lower(), ev.source_url)
+                if key_ev not in seen:
+                    seen.add(key_ev)
+                    yield ev
+        except Exception as e:
+            debug_info[f"Analyst Parse Error (batch {i + 1})"] = str(e)
+            record(parse_errors=1)
+    if cache is not None:
+        debug_info["LLM Cache"] = str(cache.stats())
@@ -0,0 +1,226 @@
+import os
+import re
+import sys
+import json
+import mmap
+import sqlite3
+import argparse
+import threading
+from typing import Iterable, Iterator, Optional
+from langchain_core.documents import Document
+
+# Local article archive: append-only JSONL segment files plus a SQLite offset index on
+# (company, date). Lookups read single records through mmap, so the corpus is never loaded
+# into memory and ingesting never rewrites existing segments.
+
+ARCHIVE_DIR = os.getenv("MARKET_PULSE_ARCHIVE")
+SEGMENT_MAX_BYTES = int(os.getenv("MARKET_PULSE_SEGMENT_MAX_BYTES", str(256 * 1024 * 1024)))
+
+
+def normalize_date(value) -> str:
+    # "2025-05-8" -> "2025-05-08", so dates sort and compare as strings
+    match = re.match(r"^\s*(\d{4})-(\d{1,2})-(\d{1,2})", str(value or ""))
+    if not match:
+        return ""
+    year, month, day = match.groups()
+    return f"{year}-{int(month):02d}-{int(day):02d}"
+
+
+class ArticleArchive:
+    def __init__(self, root=ARCHIVE_DIR, segment_max_bytes=SEGMENT_MAX_BYTES):
+        if not root:
+            raise ValueError("No archive directory given (set MARKET_PULSE_ARCHIVE)")
+        self.root = root
+        self.segment_max_bytes = segment_max_bytes
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._maps = {}  # segment number -> (file, mmap)
+        self._conn = sqlite3.connect(os.path.join(root, "index.sqlite"), check_same_thread=False)
+        self._conn.executescript(
+            "PRAGMA journal_mode=WAL;"
+            "CREATE TABLE IF NOT EXISTS articles ("
+            "  company TEXT NOT NULL, url TEXT NOT NULL, date TEXT NOT NULL, title TEXT,"
+            "  segment INTEGER NOT NULL, offset INTEGER NOT NULL, length INTEGER NOT NULL,"
+            "  PRIMARY KEY (company, url));"
+            "CREATE INDEX IF NOT EXISTS idx_articles_company_date ON articles(company, date);"
+        )
+        self._conn.commit()
+
+    def _segment_path(self, segment):
+        return os.path.join(self.root, f"segment-{segment:05d}.jsonl")
+
+    def _current_segment(self):
+        row = self._conn.execute("SELECT MAX(segment) FROM articles").fetchone()
+        segment = row[0] or 1
+        path = self._segment_path(segment)
+        if os.path.exists(path) and os.path.getsize(path) >= self.segment_max_bytes:
+            segment += 1
+        return segment
+
+    def ingest(self, articles: Iterable[dict]) -> int:
+        """Append articles (company, url, title, date, content) and index them; returns the count.
+
+        The same URL may be filed under several companies. Re-ingesting it for a company points
+        that company's entry at the new record; the old bytes are left in place.
+        """
+        count = 0
+        with self._lock:
+            segment = self._current_segment()
+            f = open(self._segment_path(segment), "ab")
+            try:
+                rows = []
+                for art in articles:
+                    if f.tell() >= self.segment_max_bytes:
+                        f.close()
+                        segment += 1
+                        f = open(self._segment_path(segment), "ab")
+                    record = {
+                        "company": art["company"],
+                        "url": art.get("url", ""),
+                        "title": art.get("title", ""),
+                        "date": normalize_date(art.get("date")),
+                        "content": art.get("content") or "",
+                    }
+                    line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+                    offset = f.tell()
+                    f.write(line)
+                    rows.append((record["url"], record["company"], record["date"], record["title"],
+                                 segment, offset, len(line)))
+                    count += 1
+                    if len(rows) >= 10000:
+                        self._index(f, rows)
+                        rows = []
+                self._index(f, rows)
+                f.flush()
+                os.fsync(f.fileno())
+            finally:
+                f.close()
+            self._conn.commit()
+        return count
+
+    def _index(self, f, rows):
+        # Records must be written before the index points at them
+        f.flush()
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO articles (url, company, date, title, segment, offset, length) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+
+    def _read(self, segment, offset, length) -> dict:
+        with self._lock:
+            entry = self._maps.get(segment)
+            # Remap when the segment grew since it was mapped
+            if entry is None or offset + length > len(entry[1]):
+                if entry is not None:
+                    entry[1].close()
+                    entry[0].close()
+                f = open(self._segment_path(segment), "rb")
+                entry = (f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+                self._maps[segment] = entry
+            data = entry[1][offset:offset + length]
+        return json.loads(data)
+
+    def iter_documents(self, company, start_date=None, end_date=None, limit=None) -> Iterator[Document]:
+        # Newest first; dates are inclusive bounds ("YYYY-MM-DD")
+        query = "SELECT segment, offset, length FROM articles WHERE company = ?"
+        params = [company]
+        if start_date:
+            query += " AND date >= ?"
+            params.append(normalize_date(start_date))
+        if end_date:
+            query += " AND date <= ?"
+            params.append(normalize_date(end_date))
+        query += " ORDER BY date DESC"
+        if limit:
+            query += " LIMIT ?"
+            params.append(int(limit))
+        with self._lock:
+            cursor = self._conn.execute(query, params)
+        while True:
+            # Page through the index so huge result sets are never materialized
+            with self._lock:
+                rows = cursor.fetchmany(1000)
+            if not rows:
+                break
+            for segment, offset, length in rows:
+                record = self._read(segment, offset, length)
+                yield Document(
+                    page_content=record["content"],
+                    metadata={"title": record["title"], "date": record["date"], "url": record["url"]},
+                )
+
+    def companies(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT DISTINCT company FROM articles ORDER BY company")]
+
+    def count(self, company=None):
+        with self._lock:
+            if company is None:
+                return self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+            return self._conn.execute("SELECT COUNT(*) FROM articles WHERE company = ?", (company,)).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            for f, mm in self._maps.values():
+                mm.close()
+                f.close()
+            self._maps.clear()
+            self._conn.close()
+
+
+_default_archive = None
+_default_lock = threading.Lock()
+
+
+def get_archive() -> Optional[ArticleArchive]:
+    # The archive replaces COMPANY_NEWS only when MARKET_PULSE_ARCHIVE is configured
+    global _default_archive
+    if not ARCHIVE_DIR:
+        return None
+    with _default_lock:
+        if _default_archive is None:
+            _default_archive = ArticleArchive(ARCHIVE_DIR)
+        return _default_archive
+
+
+def iter_company_news(company_news) -> Iterator[dict]:
+    # Flatten a COMPANY_NEWS-style mapping, loading content_file lazily one article at a time
+    for company, articles in company_news.items():
+        for art in articles:
+            content = art.get("content")
+            if content is None and art.get("content_file"):
+                with open(art["content_file"], "r") as f:
+                    content = f.read()
+            yield {**art, "company": company, "content": content}
+
+
+def iter_jsonl(path) -> Iterator[dict]:
+    with open(path, "r") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest articles into the local Market Pulse archive.")
+    parser.add_argument("--root", default=ARCHIVE_DIR, help="Archive directory (default: $MARKET_PULSE_ARCHIVE)")
+    parser.add_argument("--examples", action="store_true", help="Ingest the built-in examples.COMPANY_NEWS")
+    parser.add_argument("jsonl", nargs="*", help="JSONL files with company, url, title, date, content")
+    args = parser.parse_args(argv)
+    if not args.root:
+        parser.error("no archive directory (use --root or MARKET_PULSE_ARCHIVE)")
+
+    archive = ArticleArchive(args.root)
+    total = 0
+    if args.examples:
+        from examples import COMPANY_NEWS
+        total += archive.ingest(iter_company_news(COMPANY_NEWS))
+    for path in args.jsonl:
+        total += archive.ingest(iter_jsonl(path))
+    print(f"Ingested {total} article(s); archive holds {archive.count()}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
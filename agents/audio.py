@@ -0,0 +1,161 @@
+import io
+import os
+import wave
+import hashlib
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Tuple
+from agents.tracing import traced
+
+# Audio summaries: text-to-speech runs in a background thread pool and results are cached on
+# disk by a hash of (backend, language, text), so an unchanged report is never re-synthesized.
+# Backends are pluggable like the LLM providers; select with TTS_BACKEND=gtts|pyttsx3|silent.
+
+AUDIO_DIR = os.getenv("MARKET_PULSE_AUDIO_DIR", ".cache/audio")
+TTS_BACKEND = os.getenv("TTS_BACKEND", "gtts")
+AUDIO_WORKERS = int(os.getenv("MARKET_PULSE_AUDIO_WORKERS", "2"))
+AUDIO_TIMEOUT = float(os.getenv("MARKET_PULSE_AUDIO_TIMEOUT", "60"))  # seconds the page waits for the audio
+
+# name -> (synthesize(text, lang) -> bytes, file extension)
+TTS_BACKENDS = {}
+_executor = None
+_pending = {}  # cache key -> Future, so concurrent requests for one summary share a synthesis
+_lock = threading.Lock()
+
+
+def register_backend(name, extension):
+    def decorator(synthesize):
+        TTS_BACKENDS[name] = (synthesize, extension)
+        return synthesize
+    return decorator
+
+
+@register_backend("gtts", "mp3")
+def _gtts(text, lang):
+    # Google Translate TTS (network)
+    from gtts import gTTS
+    fp = io.BytesIO()
+    gTTS(text=text, lang=lang).write_to_fp(fp)
+    return fp.getvalue()
+
+
+@register_backend("pyttsx3", "wav")
+def _pyttsx3(text, lang):
+    # Offline, uses the system speech engine (espeak, SAPI5 or NSSpeechSynthesizer)
+    import tempfile
+    import pyttsx3
+    engine = pyttsx3.init()
+    for voice in engine.getProperty("voices"):
+        if lang in str(getattr(voice, "languages", "")) or lang in voice.id:
+            engine.setProperty("voice", voice.id)
+            break
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "summary.wav")
+        engine.save_to_file(text, path)
+        engine.runAndWait()
+        with open(path, "rb") as f:
+            return f.read()
+
+
+@register_backend("silent", "wav")
+def _silent(text, lang):
+    # Offline stub for tests and benchmarks: silence lasting roughly as long as the text would
+    rate = 8000
+    seconds = max(1, len(text.split()) // 3)
+    fp = io.BytesIO()
+    with wave.open(fp, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(1)
+        w.setframerate(rate)
+        w.writeframes(b"\x80" * rate * seconds)
+    return fp.getvalue()
+
+
+def audio_summary_text(advisor_output, company, report_date) -> str:
+    # Only the day is spoken, so the same report generated minutes later hits the cache
+    return (
+        f"Advisor Report for {company}, dated {str(report_date)[:10]}. "
+        f"Google Trends Score: {advisor_output.google_trends} out of 100. "
+        f"Key insights: {advisor_output.key_insights}. "
+        f"Main takeaways: {', '.join(advisor_output.key_takeaways)}. "
+        f"Risks: {advisor_output.risks_and_opportunities['risks']}. "
+        f"Opportunities: {advisor_output.risks_and_opportunities['opportunities']}. "
+        f"Recommendations: {', '.join(advisor_output.recommendations)}. "
+        f"Conclusion: {advisor_output.conclusion}"
+    )
+
+
+def _backend(backend):
+    backend = backend or TTS_BACKEND
+    if backend not in TTS_BACKENDS:
+        raise ValueError(f"Unknown TTS backend '{backend}', expected one of {sorted(TTS_BACKENDS)}")
+    return backend
+
+
+def audio_path(text, lang="en", backend=None, audio_dir=AUDIO_DIR) -> str:
+    backend = _backend(backend)
+    key = hashlib.sha256(f"{backend}\0{lang}\0{text}".encode("utf-8")).hexdigest()
+    return os.path.join(audio_dir, f"{key}.{TTS_BACKENDS[backend][1]}")
+
+
+def cached_audio(text, lang="en", backend=None, audio_dir=AUDIO_DIR) -> Optional[bytes]:
+    path = audio_path(text, lang, backend, audio_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return f.read()
+
+
+@traced("generate_audio_summary")
+def synthesize(text, lang="en", backend=None, audio_dir=AUDIO_DIR, company=None) -> bytes:
+    """Audio for `text`, from the disk cache or the TTS backend (blocking)."""
+    data = cached_audio(text, lang, backend, audio_dir)
+    if data is not None:
+        return data
+    backend = _backend(backend)
+    data = TTS_BACKENDS[backend][0](text, lang)
+    path = audio_path(text, lang, backend, audio_dir)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return data
+
+
+def submit_audio(text, lang="en", backend=None, audio_dir=AUDIO_DIR, company=None) -> Future:
+    # Non-blocking: cached audio comes back as an already resolved Future
+    global _executor
+    data = cached_audio(text, lang, backend, audio_dir)
+    if data is not None:
+        done = Future()
+        done.set_result(data)
+        return done
+    path = audio_path(text, lang, backend, audio_dir)
+    with _lock:
+        future = _pending.get(path)
+        if future is not None:
+            return future
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=AUDIO_WORKERS, thread_name_prefix="tts")
+        future = _executor.submit(synthesize, text, lang, backend, audio_dir, company)
+        _pending[path] = future
+    # Outside _lock: a future that is already done runs the callback (and _forget) right here
+    future.add_done_callback(lambda f: _forget(path, f))
+    return future
+
+
+def _forget(path, future):
+    with _lock:
+        if _pending.get(path) is future:
+            del _pending[path]
+
+
+def audio_format(backend=None) -> str:
+    return f"audio/{'mpeg' if TTS_BACKENDS[_backend(backend)][1] == 'mp3' else 'wav'}"
+
+
+def summary_audio(advisor_output, company, report_date, lang="en", backend=None) -> Tuple[Future, str]:
+    # (future audio bytes, MIME type) for an advisor report
+    text = audio_summary_text(advisor_output, company, report_date)
+    return submit_audio(text, lang, backend, company=company), audio_format(backend)
@@ -0,0 +1,182 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from typing import Callable, Optional
+from agents.tracing import record, tracing_handler
+
+# Persistent cache for raw LLM completions, keyed by rendered prompt + model + temperature
+CACHE_PATH = os.getenv("MARKET_PULSE_CACHE_PATH", ".cache/llm_cache.sqlite")
+CACHE_TTL = int(os.getenv("MARKET_PULSE_CACHE_TTL", str(7 * 24 * 3600)))  # seconds
+CACHE_MAX_BYTES = int(os.getenv("MARKET_PULSE_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+CACHE_ENABLED = os.getenv("MARKET_PULSE_CACHE", "1") != "0"
+
+
+def llm_identity(llm):
+    # Model name and temperature as exposed by LangChain chat models / LLMs
+    model = (
+        getattr(llm, "model_name", None)
+        or getattr(llm, "model", None)
+        or getattr(llm, "repo_id", None)
+        or type(llm).__name__
+    )
+    temperature = getattr(llm, "temperature", None)
+    return str(model), temperature
+
+
+def make_key(prompt: str, model: str, temperature) -> str:
+    payload = json.dumps([prompt, model, temperature], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    def __init__(self, path=CACHE_PATH, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Streamlit runs scripts in worker threads: share one connection behind a lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_access ON llm_cache(last_access)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (self.ttl and now - row[1] > self.ttl):
+                if row is not None:
+                    self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, value: str):
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def _evict(self, now):
+        # Drop expired entries, then least recently used ones until under the size bound
+        if self.ttl:
+            self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM llm_cache ORDER BY last_access ASC"):
+            if total <= self.max_bytes:
+                break
+            victims.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM llm_cache WHERE key = ?", victims)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+            ).fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_cache() -> Optional[LLMCache]:
+    global _default_cache
+    if not CACHE_ENABLED:
+        return None
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = LLMCache()
+        return _default_cache
+
+
+def cached_call(llm, prompt: str, parse: Callable[[str], object], cache: Optional[LLMCache] = None):
+    """Invoke `llm` on `prompt` and parse the text, reusing a cached completion when possible.
+
+    Only completions that parse successfully are stored, so a malformed answer is never replayed.
+    """
+    if cache is None:
+        text = llm.invoke(prompt, config={"callbacks": [tracing_handler]})
+        return parse(text.content if hasattr(text, "content") else text)
+
+    model, temperature = llm_identity(llm)
+    key = make_key(prompt, model, temperature)
+    text = cache.get(key)
+    if text is not None:
+        try:
+            result = parse(text)
+            record(cache_hits=1)
+            return result
+        except Exception:
+            cache.delete(key)
+    record(cache_misses=1)
+
+    text = llm.invoke(prompt, config={"callbacks": [tracing_handler]})
+    text = text.content if hasattr(text, "content") else text
+    result = parse(text)
+    cache.set(key, text)
+    return result
+
+
+async def acached_call(llm, prompt: str, parse: Callable[[str], object], cache: Optional[LLMCache] = None):
+    # Async twin of cached_call, built on llm.ainvoke (SQLite lookups are fast enough to stay inline)
+    if cache is None:
+        text = await llm.ainvoke(prompt, config={"callbacks": [tracing_handler]})
+        return parse(text.content if hasattr(text, "content") else text)
+
+    model, temperature = llm_identity(llm)
+    key = make_key(prompt, model, temperature)
+    text = cache.get(key)
+    if text is not None:
+        try:
+            result = parse(text)
+            record(cache_hits=1)
+            return result
+        except Exception:
+            cache.delete(key)
+    record(cache_misses=1)
+
+    text = await llm.ainvoke(prompt, config={"callbacks": [tracing_handler]})
+    text = text.content if hasattr(text, "content") else text
+    result = parse(text)
+    cache.set(key, text)
+    return result
@@ -0,0 +1,339 @@
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import argparse
+import threading
+from datetime import datetime
+from typing import Iterable, List, Optional
+import numpy as np
+from agents.analyst import Event
+from agents.archive import normalize_date
+from agents.dedup import normalize_stage
+
+# Column-oriented event store shared by every run. Each write appends a segment directory of
+# .npy columns; categorical fields are dictionary-encoded as int32 codes (-1 = missing), dates
+# are kept as written for exports, with a parsed datetime64 "day" column for range queries.
+# Queries filter the (small) dictionaries first, then select rows with one vectorized pass
+# over the codes, so they stay fast across thousands of companies.
+
+COLUMNAR_DIR = os.getenv("MARKET_PULSE_COLUMNAR_DIR", ".cache/events")
+COLUMNAR_ENABLED = os.getenv("MARKET_PULSE_COLUMNAR", "1") != "0"
+COMPACT_SEGMENTS = int(os.getenv("MARKET_PULSE_COMPACT_SEGMENTS", "64"))
+
+CATEGORICAL = ("company", "type", "development_stage", "partners", "indication")
+TEXT = ("title", "date", "deal_value", "product_name", "status", "mechanism_of_action", "competitors",
+        "summary", "source_url")
+EXPORT_COLUMNS = ("company", "type", "title", "date", "partners", "deal_value", "product_name", "indication",
+                  "development_stage", "status", "mechanism_of_action", "competitors", "source_url")
+EXPORT_HEADERS = {
+    "company": "Company", "type": "Type", "title": "Title", "date": "Date", "partners": "Partners",
+    "deal_value": "Value", "product_name": "Product", "indication": "Indication", "development_stage": "Stage",
+    "status": "Status", "mechanism_of_action": "MOA", "competitors": "Competitors", "source_url": "Source",
+}
+
+# Besides YYYY-M-D: "May 14, 2025", "14 May 2025", "2025/05/14", "05/14/2025", "May 2025"
+_DATE_FORMATS = ("%B %d, %Y", "%b %d, %Y", "%B %d %Y", "%b %d %Y", "%d %B %Y", "%d %b %Y",
+                 "%Y/%m/%d", "%m/%d/%Y", "%B %Y", "%b %Y")
+
+
+def parse_date(value) -> str:
+    # "YYYY-MM-DD" for the formats news dates come in, "" when unrecognized
+    date = normalize_date(value)
+    if date:
+        return date
+    text = re.sub(r"\s+", " ", str(value or "").strip().replace("Sept", "Sep")).replace(".", "")
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return ""
+
+
+def _to_date(value):
+    date = parse_date(value)
+    return np.datetime64(date, "D") if date else np.datetime64("NaT", "D")
+
+
+class EventColumns:
+    """A set of events as columns; categorical columns stay encoded until exported."""
+
+    def __init__(self, columns, dictionaries):
+        self.columns = columns
+        self.dictionaries = dictionaries
+
+    def __len__(self):
+        return len(self.columns["date"])
+
+    def take(self, rows) -> "EventColumns":
+        return EventColumns({name: col[rows] for name, col in self.columns.items()}, self.dictionaries)
+
+    def column(self, name) -> np.ndarray:
+        # Decoded string column ("" for missing values)
+        col = self.columns[name]
+        if name in CATEGORICAL:
+            values = np.array([""] + self.dictionaries[name], dtype=str)
+            return values[col + 1]
+        return col.astype(str)
+
+    def to_events(self) -> List[Event]:
+        names = ("type", "title", "date", "partners", "deal_value", "product_name", "indication",
+                 "development_stage", "status", "mechanism_of_action", "competitors", "summary", "source_url")
+        decoded = [self.column(name).tolist() for name in names]
+        return [
+            Event(**{name: (value or None) for name, value in zip(names, row)})
+            for row in zip(*decoded)
+        ]
+
+    def to_csv(self, columns=EXPORT_COLUMNS) -> str:
+        header = ",".join(EXPORT_HEADERS.get(name, name) for name in columns)
+        if not len(self):
+            return header + "\n"
+        quoted = [
+            np.strings.add(np.strings.add('"', np.strings.replace(self.column(name), '"', '""')), '"')
+            for name in columns
+        ]
+        return "\n".join([header] + _join_columns(quoted, ",").tolist()) + "\n"
+
+    def to_markdown(self, columns=EXPORT_COLUMNS) -> str:
+        header = "| " + " | ".join(EXPORT_HEADERS.get(name, name) for name in columns) + " |\n"
+        header += "|" + "---|" * len(columns) + "\n"
+        if not len(self):
+            return header
+        cells = [
+            np.strings.replace(np.strings.replace(self.column(name), "|", "\\|"), "\n", " ")
+            for name in columns
+        ]
+        rows = np.strings.add(np.strings.add("| ", _join_columns(cells, " | ")), " |")
+        return header + "\n".join(rows.tolist()) + "\n"
+
+
+def _join_columns(columns, separator) -> np.ndarray:
+    rows = columns[0]
+    for col in columns[1:]:
+        rows = np.strings.add(np.strings.add(rows, separator), col)
+    return rows
+
+
+def encode_events(events: Iterable[Event], company="", dictionaries=None, written_at=None) -> EventColumns:
+    """Build columns for `events`; new categorical values are appended to `dictionaries`."""
+    events = list(events)
+    dictionaries = dictionaries if dictionaries is not None else {name: [] for name in CATEGORICAL}
+    columns = {}
+    for name in CATEGORICAL:
+        values = dictionaries.setdefault(name, [])
+        lookup = {value: code for code, value in enumerate(values)}
+        codes = np.empty(len(events), dtype=np.int32)
+        for i, ev in enumerate(events):
+            value = company if name == "company" else getattr(ev, name)
+            value = str(value).strip() if value else ""
+            if not value:
+                codes[i] = -1
+                continue
+            if value not in lookup:
+                lookup[value] = len(values)
+                values.append(value)
+            codes[i] = lookup[value]
+        columns[name] = codes
+    for name in TEXT:
+        columns[name] = np.array([str(getattr(ev, name) or "") for ev in events], dtype=str)
+    columns["day"] = np.array([_to_date(ev.date) for ev in events], dtype="datetime64[D]")
+    columns["written_at"] = np.full(len(events), written_at or time.time(), dtype=np.float64)
+    return EventColumns(columns, dictionaries)
+
+
+def _concat(parts: List[EventColumns], dictionaries) -> EventColumns:
+    if not parts:
+        return encode_events([], dictionaries=dictionaries)
+    names = parts[0].columns.keys()
+    return EventColumns({name: np.concatenate([p.columns[name] for p in parts]) for name in names}, dictionaries)
+
+
+def _latest_rows(table: EventColumns) -> np.ndarray:
+    # A later write for the same (company, source article) supersedes the earlier events
+    written = table.columns["written_at"]
+    if not len(written):
+        return np.arange(0)
+    company = table.columns["company"]
+    source = np.where(table.columns["source_url"] == "", table.columns["title"], table.columns["source_url"])
+    order = np.lexsort((written, source, company))
+    company, source, written = company[order], source[order], written[order]
+    starts = np.r_[True, (company[1:] != company[:-1]) | (source[1:] != source[:-1])]
+    group = np.cumsum(starts) - 1
+    latest = np.maximum.reduceat(written, np.flatnonzero(starts))
+    return np.sort(order[written == latest[group]])
+
+
+class ColumnarEventStore:
+    def __init__(self, root=COLUMNAR_DIR, compact_segments=COMPACT_SEGMENTS):
+        self.root = root
+        self.compact_segments = compact_segments
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._dictionaries = self._load_dictionaries()
+        self._table = None  # (segment names, live rows), rebuilt when segments change
+
+    def _dictionaries_path(self):
+        return os.path.join(self.root, "dictionaries.json")
+
+    def _load_dictionaries(self):
+        path = self._dictionaries_path()
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                return json.load(f)
+        return {name: [] for name in CATEGORICAL}
+
+    def _segments(self):
+        return sorted(name for name in os.listdir(self.root) if name.startswith("segment-"))
+
+    def _write_segment(self, table: EventColumns):
+        # Dictionaries first (append-only, so existing codes stay valid), then the segment itself
+        tmp = f"{self._dictionaries_path()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._dictionaries, f, ensure_ascii=False)
+        os.replace(tmp, self._dictionaries_path())
+        segments = self._segments()
+        number = int(segments[-1].split("-")[1]) + 1 if segments else 1
+        final = os.path.join(self.root, f"segment-{number:06d}")
+        staging = os.path.join(self.root, f".staging-{number:06d}")
+        os.makedirs(staging, exist_ok=True)
+        for name, col in table.columns.items():
+            np.save(os.path.join(staging, f"{name}.npy"), col, allow_pickle=False)
+        os.replace(staging, final)
+
+    def _read_segment(self, name) -> EventColumns:
+        path = os.path.join(self.root, name)
+        columns = {
+            f[:-4]: np.load(os.path.join(path, f), mmap_mode="r", allow_pickle=False)
+            for f in os.listdir(path) if f.endswith(".npy")
+        }
+        return EventColumns(columns, self._dictionaries)
+
+    def write(self, company, events: Iterable[Event]) -> int:
+        """Append one run's events for `company`; they replace earlier events from the same articles."""
+        events = list(events)
+        if not events:
+            return 0
+        with self._lock:
+            self._write_segment(encode_events(events, company, self._dictionaries))
+            if len(self._segments()) > self.compact_segments:
+                self._compact()
+        return len(events)
+
+    def _compact(self):
+        # Merge all segments into one, dropping superseded rows
+        segments = self._segments()
+        self._write_segment(self._load())
+        for name in segments:
+            shutil.rmtree(os.path.join(self.root, name))
+
+    def compact(self):
+        with self._lock:
+            self._compact()
+
+    def _load(self) -> EventColumns:
+        segments = self._segments()
+        if self._table is None or self._table[0] != segments:
+            # Another process may have written since: pick up its dictionary entries too
+            for name, values in self._load_dictionaries().items():
+                if len(values) > len(self._dictionaries.get(name, [])):
+                    self._dictionaries[name] = values
+            table = _concat([self._read_segment(name) for name in segments], self._dictionaries)
+            self._table = (segments, table.take(_latest_rows(table)))
+        return self._table[1]
+
+    def table(self) -> EventColumns:
+        with self._lock:
+            return self._load()
+
+    def query(self, companies=None, type=None, stage=None, indication=None, partner=None,
+              since=None, until=None, days=None, today=None) -> EventColumns:
+        """Events matching every given filter.
+
+        `stage` is compared after normalization ("Phase III" == "phase 3"), `indication` and
+        `partner` are case-insensitive substrings, `days` keeps events dated within the last N days.
+        """
+        table = self.table()
+        mask = np.ones(len(table), dtype=bool)
+        if companies is not None:
+            companies = [companies] if isinstance(companies, str) else companies
+            mask &= self._match("company", lambda v: v in set(companies), table)
+        if type is not None:
+            mask &= self._match("type", lambda v: v.lower() == type.lower(), table)
+        if stage is not None:
+            mask &= self._match("development_stage", lambda v: normalize_stage(v) == normalize_stage(stage), table)
+        if indication is not None:
+            mask &= self._match("indication", lambda v: indication.lower() in v.lower(), table)
+        if partner is not None:
+            mask &= self._match("partners", lambda v: partner.lower() in v.lower(), table)
+        dates = table.columns["day"]
+        if days is not None:
+            today = np.datetime64(today or time.strftime("%Y-%m-%d"), "D")
+            since = today - np.timedelta64(int(days), "D")
+        if since is not None:
+            mask &= dates >= _to_date(since)  # NaT never compares true
+        if until is not None:
+            mask &= dates <= _to_date(until)
+        return table.take(np.flatnonzero(mask))
+
+    def _match(self, name, predicate, table) -> np.ndarray:
+        codes = [code for code, value in enumerate(self._dictionaries[name]) if predicate(value)]
+        return np.isin(table.columns[name], np.array(codes, dtype=np.int32))
+
+    def count(self) -> int:
+        return len(self.table())
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def get_columnar_store() -> Optional[ColumnarEventStore]:
+    # Every run records its events here unless MARKET_PULSE_COLUMNAR=0
+    global _default_store
+    if not COLUMNAR_ENABLED:
+        return None
+    with _default_lock:
+        if _default_store is None:
+            _default_store = ColumnarEventStore()
+        return _default_store
+
+
+def record_events(company, events: Iterable[Event]) -> int:
+    store = get_columnar_store()
+    return store.write(company, events) if store is not None else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the Market Pulse columnar event store.")
+    parser.add_argument("--root", default=COLUMNAR_DIR, help="Store directory (default: $MARKET_PULSE_COLUMNAR_DIR)")
+    parser.add_argument("--company", action="append", dest="companies", help="Repeatable; default: all companies")
+    parser.add_argument("--type", choices=("deal", "pipeline", "other"))
+    parser.add_argument("--stage", help='e.g. "phase 3" (matches "Phase III")')
+    parser.add_argument("--indication", help="Case-insensitive substring")
+    parser.add_argument("--partner", help="Case-insensitive substring")
+    parser.add_argument("--since", help="YYYY-MM-DD")
+    parser.add_argument("--until", help="YYYY-MM-DD")
+    parser.add_argument("--days", type=int, help="Only events dated within the last N days")
+    parser.add_argument("--format", choices=("csv", "markdown"), default="csv")
+    parser.add_argument("-o", "--output", help="Output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    store = ColumnarEventStore(args.root)
+    result = store.query(companies=args.companies, type=args.type, stage=args.stage, indication=args.indication,
+                         partner=args.partner, since=args.since, until=args.until, days=args.days)
+    text = result.to_csv() if args.format == "csv" else result.to_markdown()
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
+    print(f"{len(result)} of {store.count()} event(s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+import os
+import json
+import asyncio
+import contextvars
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+from agents.prompts import ADVISOR_DIGEST_PROMPT
+from agents.tokens import count_tokens, truncate_tokens, tokenizer_name
+from agents.cache import acached_call
+from agents.tracing import traced
+
+# Advisor prompt compaction: events are sent without null fields or source URLs and with
+# token-capped summaries. When they still exceed the budget, each over-budget type group
+# (deal/pipeline/other) is pre-summarized into a digest (map over chunks, then reduce), so the
+# advisor prompt stays bounded whatever the number of events. The calls of each map/reduce level,
+# across all groups, run concurrently: latency grows with the tree depth, not the event count.
+
+ADVISOR_TOKEN_BUDGET = int(os.getenv("ADVISOR_TOKEN_BUDGET", "3000"))         # tokens of events_json
+SUMMARY_MAX_TOKENS = int(os.getenv("ADVISOR_SUMMARY_MAX_TOKENS", "80"))      # per event summary
+DIGEST_INPUT_TOKENS = int(os.getenv("ADVISOR_DIGEST_INPUT_TOKENS", "6000"))  # per digest call
+DIGEST_CONCURRENCY = int(os.getenv("ADVISOR_DIGEST_CONCURRENCY", "8"))       # parallel digest calls
+
+TYPE_ORDER = ("deal", "pipeline", "other")
+_DROPPED = ("source_url", "source_urls")  # the report never cites sources
+
+
+def _dumps(data) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def compact_event(ev, summary_tokens=SUMMARY_MAX_TOKENS) -> dict:
+    data = ev.dict() if hasattr(ev, "dict") else dict(ev)
+    data = {k: v for k, v in data.items() if k not in _DROPPED and v not in (None, "", [], {})}
+    if data.get("summary"):
+        data["summary"] = truncate_tokens(data["summary"], summary_tokens)
+    return data
+
+
+def _chunks(items: List[dict], max_tokens) -> List[List[dict]]:
+    chunks, current, used = [], [], 0
+    for item in items:
+        tokens = count_tokens(_dumps(item))
+        if current and used + tokens > max_tokens:
+            chunks.append(current)
+            current, used = [], 0
+        current.append(item)
+        used += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+async def _adigest(llm, company, event_type, items, budget, cache, semaphore) -> str:
+    """Digest of `items` within about `budget` tokens; chunks are digested first, then merged."""
+    max_words = max(30, int(budget * 0.7))
+
+    async def call(payload):
+        prompt = ADVISOR_DIGEST_PROMPT.format(
+            company=company, event_type=event_type, max_words=max_words, events_json=payload,
+        )
+        async with semaphore:
+            return await acached_call(llm, prompt, _parse_digest, cache)
+
+    chunks = _chunks(items, DIGEST_INPUT_TOKENS)
+    digests = await asyncio.gather(*(call(_dumps(chunk)) for chunk in chunks))
+    # Reduce level by level until a single digest is left
+    while len(digests) > 1:
+        groups = _chunks([{"digest": d} for d in digests], DIGEST_INPUT_TOKENS)
+        if len(groups) == len(digests):  # digests too long to pair up: merge them pairwise
+            groups = [[{"digest": d} for d in digests[i:i + 2]] for i in range(0, len(digests), 2)]
+        digests = await asyncio.gather(*(call(_dumps([g["digest"] for g in group])) for group in groups))
+    return truncate_tokens(digests[0], budget)
+
+
+def _digest_groups(llm, company, groups, cache=None, concurrency=DIGEST_CONCURRENCY) -> dict:
+    # {type: (items, budget)} -> {type: digest}, every group digested in the same event loop
+    async def run():
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+        digests = await asyncio.gather(*(
+            _adigest(llm, company, t, items, budget, cache, semaphore) for t, (items, budget) in groups.items()
+        ))
+        return dict(zip(groups, digests))
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(run())
+    # Called from inside an event loop: run ours on a worker thread, keeping the current span
+    context = contextvars.copy_context()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(context.run, asyncio.run, run()).result()
+
+
+def _parse_digest(text) -> str:
+    text = text.strip()
+    if not text:
+        raise ValueError("Empty digest")
+    return text
+
+
+@traced("compact_events")
+def compact_events(company, events, llm=None, cache=None, budget=ADVISOR_TOKEN_BUDGET,
+                   summary_tokens=SUMMARY_MAX_TOKENS, debug_info=None) -> Tuple[str, dict]:
+    """Return (events_json for ADVISOR_PROMPT, stats). Only over-budget type groups are digested."""
+    items = [compact_event(ev, summary_tokens) for ev in events]
+    events_json = _dumps(items)
+    stats = {
+        "events": len(items),
+        "raw_tokens": count_tokens(_dumps([ev.dict() if hasattr(ev, "dict") else ev for ev in events])),
+        "compact_tokens": count_tokens(events_json),
+        "digested": [],
+    }
+    if stats["compact_tokens"] > budget and llm is not None:
+        groups = OrderedDict((t, []) for t in TYPE_ORDER)
+        for item in items:
+            groups.setdefault(item.get("type") or "other", []).append(item)
+        groups = OrderedDict((t, g) for t, g in groups.items() if g)
+        sizes = {t: count_tokens(_dumps(g)) for t, g in groups.items()}
+        # Small groups stay verbatim; the rest of the budget is shared by the groups to digest
+        share = budget / len(groups)
+        verbatim = {t for t, size in sizes.items() if size <= share}
+        remaining = budget - sum(sizes[t] for t in verbatim)
+        to_digest = [t for t in groups if t not in verbatim]
+        digest_budget = max(50, int(remaining / len(to_digest)) - 20)
+        digests = _digest_groups(llm, company, {t: (groups[t], digest_budget) for t in to_digest}, cache)
+        sections = OrderedDict()
+        for t, group in groups.items():
+            if t in verbatim:
+                sections[t] = group
+            else:
+                sections[t] = {"event_count": len(group), "digest": digests[t]}
+                stats["digested"].append(t)
+        events_json = _dumps(sections)
+    stats["prompt_tokens"] = count_tokens(events_json)
+    if debug_info is not None:
+        debug_info["Advisor Compaction"] = (
+            f"{stats['events']} events, {stats['raw_tokens']} → {stats['prompt_tokens']} tokens"
+            + (f", digested: {', '.join(stats['digested'])}" if stats["digested"] else "")
+            + f" (tokenizer: {tokenizer_name()})"
+        )
+    return events_json, stats
@@ -1,10 +1,20 @@
+from itertools import islice
 from langchain_core.documents import Document
 from examples import COMPANY_NEWS
+from agents.store import content_hash
+from agents.archive import get_archive
+from agents.tracing import traced
 
-def fetch_news(company, max_articles=3, debug=False, debug_logs=None):
-    articles = COMPANY_NEWS.get(company, [])[:max_articles]
-    docs = []
-    for art in articles:
+def iter_news(company, max_articles=3, news=None, archive=None, start_date=None, end_date=None):
+    # Lazily yield Documents from the article archive (if configured) or the COMPANY_NEWS mapping
+    archive = archive if archive is not None else (get_archive() if news is None else None)
+    if archive is not None:
+        for doc in archive.iter_documents(company, start_date=start_date, end_date=end_date, limit=max_articles):
+            doc.metadata["content_hash"] = content_hash(doc)
+            yield doc
+        return
+    articles = (COMPANY_NEWS if news is None else news).get(company, [])
+    for art in islice(articles, max_articles):
         content = art.get("content")
         if content is None and art.get("content_file"):
             with open(art["content_file"], "r") as f:
@@ -17,7 +27,18 @@ def fetch_news(company, max_articles=3, debug=False, debug_logs=None):
                 "url": art.get("url", "")
             }
         )
-        docs.append(doc)
+        doc.metadata["content_hash"] = content_hash(doc)
+        yield doc
+
+@traced("fetch_news")
+def fetch_news(company, max_articles=3, debug=False, debug_logs=None, store=None, news=None,
+               archive=None, start_date=None, end_date=None):
+    # With an EventStore, only articles never seen (or changed since last run) are returned.
+    # `news` replaces the built-in COMPANY_NEWS mapping (e.g. synthetic corpora for benchmarks).
+    docs = list(iter_news(company, max_articles=max_articles, news=news, archive=archive,
+                          start_date=start_date, end_date=end_date))
+    if store is not None:
+        docs = store.filter_new(company, docs)
     if debug and debug_logs is not None:
         debug_logs["Fetched Documents"] = str(docs)
-    return docs
\ No newline at end of file
+    return docs
@@ -0,0 +1,159 @@
+import re
+import zlib
+import random
+from collections import defaultdict, deque
+from typing import List
+from agents.analyst import Event
+
+# Near-duplicate event collapsing between the analyst and the advisor.
+# Candidate pairs come from MinHash LSH buckets over title+summary shingles and from
+# exact matches on normalized structured fields combined with a single MinHash value (a looser
+# LSH), so no all-pairs comparison is needed even when many events share a product. Within a
+# bucket, each event is only compared with the last MAX_REPRESENTATIVES distinct events.
+
+NUM_PERM = 32
+BANDS = 8                 # NUM_PERM / BANDS rows per band
+SHINGLE_SIZE = 3          # words per shingle
+SIMILARITY_THRESHOLD = 0.5
+STRUCTURED_THRESHOLD = 0.2  # candidates sharing a product or deal key still need some text overlap
+MAX_REPRESENTATIVES = 16    # per bucket; bounds the work when many events share a product
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(42)
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+_ROMAN = {"i": "1", "ii": "2", "iii": "3", "iv": "4"}
+
+_FIELDS = [
+    "date", "partners", "deal_value", "product_name", "indication", "development_stage",
+    "status", "mechanism_of_action", "competitors",
+]
+
+
+def normalize(value) -> str:
+    if not value:
+        return ""
+    value = re.sub(r"[^\w$.%]+", " ", str(value).lower())
+    return re.sub(r"\s+", " ", value).strip()
+
+
+def normalize_stage(value) -> str:
+    # "Phase III", "phase 3 trial", "Ph3" -> "phase 3"; anything else lowercased
+    text = str(value or "").strip().lower()
+    match = re.search(r"\bph(?:ase)?\s*([1-4]|iv|iii|ii|i)\b", text)
+    if match:
+        return f"phase {_ROMAN.get(match.group(1), match.group(1))}"
+    return text
+
+
+def shingles(text: str, k=SHINGLE_SIZE):
+    words = normalize(text).split()
+    if len(words) <= k:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+
+def minhash(items) -> tuple:
+    if not items:
+        return tuple([_PRIME] * NUM_PERM)
+    hashes = [zlib.crc32(s.encode("utf-8")) for s in items]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMS)
+
+
+def similarity(sig_a, sig_b) -> float:
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / NUM_PERM
+
+
+def _structured_keys(ev: Event):
+    # Blocking keys on normalized fields: same product, or same partners + deal value
+    keys = []
+    product = normalize(ev.product_name)
+    if product:
+        keys.append(("product", ev.type, product))
+    partners, value = normalize(ev.partners), normalize(ev.deal_value)
+    if partners and value:
+        keys.append(("deal", ev.type, partners, value))
+    return keys
+
+
+def _conflict(a: Event, b: Event) -> bool:
+    # Different type, or both events state a different date / deal value / product / stage / status
+    if a.type != b.type:
+        return True
+    for field in ("date", "deal_value", "product_name", "status"):
+        x, y = normalize(getattr(a, field)), normalize(getattr(b, field))
+        if x and y and x != y:
+            return True
+    x, y = normalize_stage(a.development_stage), normalize_stage(b.development_stage)
+    return bool(x and y and x != y)
+
+
+def _merge(group: List[Event]) -> Event:
+    # Most complete event is the base; missing fields are filled from the others
+    group = sorted(group, key=lambda ev: sum(getattr(ev, f) is not None for f in _FIELDS), reverse=True)
+    data = group[0].dict()
+    for ev in group[1:]:
+        for field in _FIELDS:
+            if data.get(field) is None and getattr(ev, field) is not None:
+                data[field] = getattr(ev, field)
+        if len(ev.summary) > len(data["summary"]):
+            data["summary"] = ev.summary
+    urls = []
+    for ev in group:
+        for url in [ev.source_url] + list(ev.source_urls):
+            if url and url not in urls:
+                urls.append(url)
+    data["source_url"] = urls[0] if urls else data["source_url"]
+    data["source_urls"] = urls
+    return Event(**data)
+
+
+def dedupe_events(events: List[Event], threshold=SIMILARITY_THRESHOLD,
+                  structured_threshold=STRUCTURED_THRESHOLD) -> List[Event]:
+    if len(events) < 2:
+        return list(events)
+    signatures = [minhash(shingles(f"{ev.title} {ev.summary}")) for ev in events]
+
+    # Candidate generation: LSH bands + structured blocking keys
+    buckets = defaultdict(list)
+    rows = NUM_PERM // BANDS
+    for i, sig in enumerate(signatures):
+        for band in range(BANDS):
+            buckets[("lsh", band, sig[band * rows:(band + 1) * rows])].append(i)
+        for key in _structured_keys(events[i]):
+            for position, value in enumerate(sig):
+                buckets[key + (position, value)].append(i)
+
+    parent = list(range(len(events)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    checked = set()
+    for key, members in buckets.items():
+        if len(members) < 2:
+            continue
+        min_similarity = threshold if key[0] == "lsh" else min(threshold, structured_threshold)
+        # Compare each member with one representative per cluster recently found in the bucket
+        reps = deque([members[0]], maxlen=MAX_REPRESENTATIVES)
+        for b in members[1:]:
+            for a in reversed(reps):
+                if (a, b) in checked:
+                    continue
+                checked.add((a, b))
+                if _conflict(events[a], events[b]):
+                    continue
+                if similarity(signatures[a], signatures[b]) >= min_similarity:
+                    parent[find(b)] = find(a)
+                    break
+            else:
+                reps.append(b)
+
+    # Groups are keyed in order of first appearance
+    groups = defaultdict(list)
+    for i in range(len(events)):
+        groups[find(i)].append(events[i])
+    return [_merge(group) if len(group) > 1 else group[0] for group in groups.values()]
@@ -0,0 +1,129 @@
+import re
+import json
+import zlib
+import time
+import asyncio
+from typing import Any, Iterator, List
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+# Deterministic offline chat model: answers the analyst and advisor prompts with valid JSON
+# built from the prompt itself. Used for tests and benchmarks (LLM_PROVIDER=fake).
+
+_ARTICLE = re.compile(
+    r"Title: (?P<title>.*?)\nDate: (?P<date>.*?)\nContent: (?P<content>.*?)\nSource: (?P<url>.*?)\n",
+    re.S,
+)
+_DEAL_WORDS = ("upfront", "acqui", "deal", "raises", "license", "licens", "milestone", "financing")
+_PIPELINE_WORDS = ("phase", "trial", "fda", "approval", "data", "study")
+
+
+def _classify(text):
+    text = text.lower()
+    if any(w in text for w in _DEAL_WORDS):
+        return "deal"
+    if any(w in text for w in _PIPELINE_WORDS):
+        return "pipeline"
+    return "other"
+
+
+def _first_sentence(text, limit=300):
+    text = " ".join(text.split())
+    end = text.find(". ")
+    return (text[:end + 1] if 0 < end < limit else text[:limit]) or "No content."
+
+
+def fake_completion(prompt: str) -> str:
+    if "BEGIN ARTICLES" in prompt:
+        events = []
+        for m in _ARTICLE.finditer(prompt.split("BEGIN ARTICLES", 1)[1]):
+            content = m.group("content")
+            events.append({
+                "type": _classify(m.group("title") + " " + content),
+                "title": m.group("title").strip(),
+                "date": m.group("date").strip() or None,
+                "partners": None,
+                "deal_value": (re.search(r"\$[\d.,]+\s*(?:billion|million|[BM])", content) or [None])[0],
+                "product_name": None,
+                "indication": None,
+                "development_stage": (re.search(r"[Pp]hase \d", content) or [None])[0],
+                "status": None,
+                "mechanism_of_action": None,
+                "competitors": None,
+                "summary": _first_sentence(content),
+                "source_url": m.group("url").strip(),
+            })
+        return json.dumps({"events": events}, ensure_ascii=False)
+    if "BEGIN DIGEST EVENTS" in prompt:
+        body = prompt.split("BEGIN DIGEST EVENTS", 1)[1]
+        titles = re.findall(r'"title":\s*"(.*?)"', body)
+        return f"{len(titles)} event(s): " + "; ".join(titles[:10]) + "."
+    if "BEGIN EVENTS" in prompt:
+        body = prompt.split("BEGIN EVENTS", 1)[1]
+        n_events = body.count("'title'") + body.count('"title"')
+        n_events += sum(int(n) for n in re.findall(r'"event_count":\s*(\d+)', body))  # digested groups
+        return json.dumps({
+            "google_trends": min(100, 10 * n_events),
+            "key_insights": f"{n_events} event(s) were reported in the period.",
+            "key_takeaways": [f"{n_events} event(s) extracted.", "Generated by the offline fake provider."],
+            "risks_and_opportunities": {"risks": "Not assessed offline.", "opportunities": "Not assessed offline."},
+            "recommendations": ["Re-run with a real provider for a full assessment."],
+            "conclusion": "Deterministic offline report.",
+        })
+    return "{}"
+
+
+class FakeChatModel(BaseChatModel):
+    model: str = "fake"
+    temperature: float = 0.0
+    latency: float = 0.0            # seconds before the first token
+    tokens_per_second: float = 0.0  # generation speed, 0 = instant
+    chunk_size: int = 16            # characters per streamed chunk
+    truncate_rate: float = 0.0      # share of prompts answered with truncated JSON (deterministic)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def _prompt(self, messages: List[BaseMessage]) -> str:
+        return "\n".join(str(m.content) for m in messages)
+
+    def _complete(self, prompt):
+        text = fake_completion(prompt)
+        if self.truncate_rate and zlib.crc32(prompt.encode("utf-8")) % 1000 < self.truncate_rate * 1000:
+            text = text[:len(text) // 2]
+        return text
+
+    def _delay(self, text):
+        generation = len(text) / 4 / self.tokens_per_second if self.tokens_per_second else 0.0
+        return self.latency + generation
+
+    def _result(self, prompt, text):
+        usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(text) // 4}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        message = AIMessage(content=text, response_metadata={"token_usage": usage, "model_name": self.model})
+        return ChatResult(generations=[ChatGeneration(message=message)], llm_output={"token_usage": usage, "model_name": self.model})
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        prompt = self._prompt(messages)
+        text = self._complete(prompt)
+        time.sleep(self._delay(text))
+        return self._result(prompt, text)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        prompt = self._prompt(messages)
+        text = self._complete(prompt)
+        await asyncio.sleep(self._delay(text))
+        return self._result(prompt, text)
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        text = self._complete(self._prompt(messages))
+        time.sleep(self.latency)
+        per_chunk = self.chunk_size / 4 / self.tokens_per_second if self.tokens_per_second else 0.0
+        for i in range(0, len(text), self.chunk_size):
+            time.sleep(per_chunk)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=text[i:i + self.chunk_size]))
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
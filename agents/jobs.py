@@ -0,0 +1,123 @@
+import os
+import json
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from agents.pipeline import run_market_pulse
+
+# Local job queue for Market Pulse runs. A worker pool runs the pipeline off the UI thread;
+# identical requests (same company and options) submitted while one is queued or running share
+# that job instead of paying for the LLM calls twice. Finished jobs are kept for polling.
+
+JOB_WORKERS = int(os.getenv("MARKET_PULSE_JOB_WORKERS", "4"))
+JOB_RETENTION = int(os.getenv("MARKET_PULSE_JOB_RETENTION", "3600"))  # seconds a finished job stays pollable
+MAX_JOBS = int(os.getenv("MARKET_PULSE_MAX_JOBS", "1000"))
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class Job:
+    def __init__(self, company, options):
+        self.id = uuid.uuid4().hex
+        self.company = company
+        self.options = options
+        self.status = QUEUED
+        self.result = None  # (analyst_output, advisor_output, debug_logs) once done
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.submissions = 1  # how many requests this job is serving
+
+    @property
+    def key(self):
+        return job_key(self.company, self.options)
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED)
+
+
+def job_key(company, options) -> str:
+    # Exact company spelling: the pipeline and its stores are case-sensitive
+    return json.dumps([company, options], sort_keys=True, default=str)
+
+
+class JobQueue:
+    def __init__(self, workers=JOB_WORKERS, retention=JOB_RETENTION, max_jobs=MAX_JOBS, run=run_market_pulse):
+        self.retention = retention
+        self.max_jobs = max_jobs
+        self._run = run
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="market-pulse-job")
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()   # id -> Job, oldest first
+        self._in_flight = {}         # job key -> Job while queued or running
+
+    def submit(self, company, **options) -> Job:
+        """Queue a run of the pipeline, or join the identical one already queued or running."""
+        company = company.strip()
+        with self._lock:
+            self._prune()
+            key = job_key(company, options)
+            job = self._in_flight.get(key)
+            if job is not None:
+                job.submissions += 1
+                return job
+            job = Job(company, options)
+            self._jobs[job.id] = job
+            self._in_flight[key] = job
+        self._executor.submit(self._work, job)
+        return job
+
+    def _work(self, job):
+        job.started_at = time.time()
+        job.status = RUNNING
+        try:
+            job.result = self._run(job.company, debug=True, **job.options)
+            job.status = DONE
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                if self._in_flight.get(job.key) is job:
+                    del self._in_flight[job.key]
+
+    def get(self, job_id) -> Optional[Job]:
+        with self._lock:
+            self._prune()
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def _prune(self):
+        # Drop finished jobs past their retention, then the oldest finished ones beyond max_jobs
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if job.finished and now - job.finished_at > self.retention:
+                del self._jobs[job_id]
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(self._jobs) - self.max_jobs)]:
+            del self._jobs[job_id]
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+_default_queue = None
+_default_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    # One queue per process, shared by every Streamlit session
+    global _default_queue
+    with _default_lock:
+        if _default_queue is None:
+            _default_queue = JobQueue()
+        return _default_queue
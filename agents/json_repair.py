@@ -0,0 +1,116 @@
+import re
+import json
+from typing import List, Tuple
+from agents.streaming import EventArrayParser
+
+# Tolerant JSON handling for LLM output: code fences, prose around the object, // comments,
+# trailing commas and truncated completions. Nothing here calls an LLM.
+
+_FENCE = re.compile(r"^\s*```[a-zA-Z]*\s*|\s*```\s*$")
+
+
+def strip_code_fences(text: str) -> str:
+    text = text.strip()
+    if text.startswith("```"):
+        text = _FENCE.sub("", text)
+    return text
+
+
+def repair_json(text: str) -> str:
+    """Best-effort fix of a JSON object (or bare array): drops text outside it, comments and trailing
+    commas, and cuts a truncated completion back to its last complete member before closing it."""
+    return _repair(text)[0]
+
+
+def _repair(text: str) -> Tuple[str, bool]:
+    # (repaired text, whether the object was cut off before its closing brace)
+    text = strip_code_fences(text)
+    start = 0 if text.startswith("[") else text.find("{")
+    if start < 0:
+        return text, False
+    text = text[start:]
+
+    out = []
+    stack = []
+    safe = (0, [])  # (len(out), stack) at the last point where the document could be closed
+    in_string = escape = is_key = False
+    last = ""       # last significant character outside strings
+    i = 0
+    while i < len(text):
+        c = text[i]
+        if in_string:
+            out.append(c)
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_string = False
+                last = c
+                if not is_key:
+                    safe = (len(out), list(stack))  # a complete string value
+            i += 1
+            continue
+        if c == '"':
+            is_key = bool(stack) and stack[-1] == "}" and last in ("{", ",")
+            in_string = True
+            out.append(c)
+        elif c == "/" and text[i:i + 2] == "//":
+            end = text.find("\n", i)
+            i = len(text) if end < 0 else end
+            continue
+        elif c in "{[":
+            stack.append("}" if c == "{" else "]")
+            out.append(c)
+            safe = (len(out), list(stack))
+        elif c in "}]":
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()  # trailing comma
+            if stack:
+                stack.pop()
+            out.append(c)
+            if not stack:
+                return "".join(out), False  # ignore anything after the top-level object
+            safe = (len(out), list(stack))
+        elif c == ",":
+            safe = (len(out), list(stack))
+            out.append(c)
+        else:
+            out.append(c)
+        if not c.isspace():
+            last = c
+        i += 1
+
+    # Truncated: keep everything up to the last complete member, then close open containers
+    length, stack = safe
+    repaired = "".join(out[:length]).rstrip().rstrip(",")
+    return repaired + "".join(reversed(stack)), True
+
+
+def loads_tolerant(text: str):
+    try:
+        return json.loads(strip_code_fences(text))
+    except json.JSONDecodeError:
+        return json.loads(repair_json(text))
+
+
+def loads_partial(text: str):
+    """(data, truncated): like loads_tolerant, but also tells whether the object was cut off.
+
+    When truncated, the last member of the top-level object may have been closed early (a short
+    list, a dict missing keys, a cut number), so callers should not trust it as complete.
+    """
+    try:
+        return json.loads(strip_code_fences(text)), False
+    except json.JSONDecodeError:
+        repaired, truncated = _repair(text)
+        return json.loads(repaired), truncated
+
+
+def recover_array_items(text: str, key="events") -> Tuple[List[dict], bool]:
+    """Complete objects of the `key` array, and whether the array was cut off before closing."""
+    parser = EventArrayParser(key=key)
+    items = parser.feed(strip_code_fences(text))
+    return items, parser.in_array
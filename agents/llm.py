@@ -0,0 +1,122 @@
+import os
+import threading
+from dotenv import load_dotenv
+
+# Shared LLM provider registry. Clients are built once per (provider, model, temperature, max_tokens)
+# and reused; provider SDKs are only imported when that provider is selected.
+# Select with LLM_PROVIDER=openai|ollama|hf|fake (per role: ANALYST_LLM_PROVIDER, ADVISOR_LLM_PROVIDER)
+# or at runtime with set_provider().
+
+load_dotenv()
+
+DEFAULT_MODELS = {
+    "openai": "gpt-4o-mini",
+    "ollama": "mistral",
+    "hf": "HuggingFaceH4/zephyr-7b-beta",
+    "fake": "fake",
+}
+ROLE_SETTINGS = {
+    "analyst": {"temperature": 0.1, "max_tokens": 2048},
+    "advisor": {"temperature": 0.3, "max_tokens": 2048},
+}
+HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "20"))
+HTTP_TIMEOUT = float(os.getenv("LLM_HTTP_TIMEOUT", "120"))
+
+PROVIDERS = {}
+_instances = {}
+_lock = threading.Lock()
+_runtime_provider = None
+_http_client = None
+
+
+def register_provider(name):
+    def decorator(factory):
+        PROVIDERS[name] = factory
+        return factory
+    return decorator
+
+
+def _shared_http_client():
+    # One pooled, keep-alive HTTP client for every OpenAI client of the process
+    global _http_client
+    if _http_client is None:
+        import httpx
+        _http_client = httpx.Client(
+            limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_CONNECTIONS),
+            timeout=HTTP_TIMEOUT,
+        )
+    return _http_client
+
+
+@register_provider("openai")
+def _openai(model, temperature, max_tokens):
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(
+        model=model,
+        temperature=temperature,
+        openai_api_key=os.getenv("OPENAI_API_KEY"),
+        max_tokens=max_tokens,
+        http_client=_shared_http_client(),
+    )
+
+
+@register_provider("ollama")
+def _ollama(model, temperature, max_tokens):
+    from langchain_community.llms import Ollama
+    return Ollama(model=model, temperature=temperature, num_predict=max_tokens)
+
+
+@register_provider("hf")
+def _huggingface(model, temperature, max_tokens):
+    from langchain_huggingface import HuggingFaceEndpoint
+    return HuggingFaceEndpoint(
+        repo_id=model,
+        temperature=temperature,
+        max_new_tokens=max_tokens,
+        huggingfacehub_api_token=os.getenv("HUGGINGFACEHUB_API_TOKEN") or os.getenv("HF_TOKEN"),
+    )
+
+
+@register_provider("fake")
+def _fake(model, temperature, max_tokens):
+    from agents.fake_llm import FakeChatModel
+    return FakeChatModel(
+        model=model,
+        temperature=temperature,
+        latency=float(os.getenv("FAKE_LLM_LATENCY", "0")),
+        tokens_per_second=float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "0")),
+        truncate_rate=float(os.getenv("FAKE_LLM_TRUNCATE_RATE", "0")),
+    )
+
+
+def set_provider(name):
+    # Runtime override for every role (None restores the environment configuration)
+    global _runtime_provider
+    if name is not None and name not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider '{name}', expected one of {sorted(PROVIDERS)}")
+    _runtime_provider = name
+
+
+def current_provider(role=None):
+    if _runtime_provider:
+        return _runtime_provider
+    if role:
+        provider = os.getenv(f"{role.upper()}_LLM_PROVIDER")
+        if provider:
+            return provider
+    return os.getenv("LLM_PROVIDER", "openai")
+
+
+def get_llm(role="analyst", provider=None, model=None, temperature=None, max_tokens=None):
+    provider = provider or current_provider(role)
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider '{provider}', expected one of {sorted(PROVIDERS)}")
+    settings = ROLE_SETTINGS.get(role, ROLE_SETTINGS["analyst"])
+    model = model or os.getenv(f"{role.upper()}_LLM_MODEL") or os.getenv("LLM_MODEL") or DEFAULT_MODELS[provider]
+    temperature = settings["temperature"] if temperature is None else temperature
+    max_tokens = settings["max_tokens"] if max_tokens is None else max_tokens
+    key = (provider, model, temperature, max_tokens)
+    with _lock:
+        if key not in _instances:
+            _instances[key] = PROVIDERS[provider](model, temperature, max_tokens)
+        return _instances[key]
@@ -0,0 +1,70 @@
+from functools import partial
+from agents.crawler import fetch_news
+from agents.analyst import AnalystOutput, extract_events, extract_events_concurrent
+from agents.advisor import get_advisor_output
+from agents.store import get_event_store
+from agents.dedup import dedupe_events
+from agents.retrieval import select_passages
+from agents.columnar import record_events
+from agents.llm import get_llm
+from agents.prompts import ANALYST_PROMPT, ADVISOR_PROMPT, get_template
+from agents.tokens import count_tokens
+from agents.tracing import traced
+
+# Build the shared LLM clients, prompt templates and tokenizer ahead of the first run
+def warm_up(provider=None):
+    for template in (ANALYST_PROMPT, ADVISOR_PROMPT):
+        get_template(template)
+    count_tokens("warm up")
+    for role in ("analyst", "advisor"):
+        try:
+            get_llm(role, provider=provider)
+        except Exception:
+            pass  # e.g. missing API key: the run itself reports it
+
+# Incremental analyst step: extract only from the new/changed articles, then merge with stored events
+def analyze_incremental(company, new_docs, store, extract=extract_events, debug=False):
+    debug_info = {"Incremental": f"{len(new_docs)} new or changed article(s)"}
+    new_urls = [doc.metadata.get("url", "") for doc in new_docs]
+    new_events = []
+    if new_docs:
+        output, extract_debug = extract(company, new_docs, debug=debug)
+        debug_info.update(extract_debug)
+        new_events = output.events
+        # A failed call must not mark its articles as processed, or they would never be retried
+        if not any("Error" in k for k in extract_debug):
+            store.update(company, new_docs, new_events)
+    stored_events = store.events(company, exclude_urls=new_urls)
+    return AnalystOutput(events=stored_events + new_events), debug_info
+
+# Collapse near-duplicate events reported by several articles before the advisor step
+def deduplicate(analyst_output, debug_logs=None, debug=False):
+    events = dedupe_events(analyst_output.events)
+    if debug and debug_logs is not None:
+        debug_logs["Deduplication"] = f"{len(analyst_output.events)} → {len(events)} events"
+    return AnalystOutput(events=events)
+
+# Headless crawl → analyst → advisor run for one company (shared by the batch runner)
+@traced("market_pulse")
+def run_market_pulse(company, max_articles=3, concurrent=False, incremental=False, retrieval=False,
+                     start_date=None, end_date=None, provider=None, debug=False):
+    debug_logs = {}
+    # provider=None keeps the environment configuration (LLM_PROVIDER, ANALYST_LLM_PROVIDER...)
+    analyst_llm = get_llm("analyst", provider=provider) if provider else None
+    advisor_llm = get_llm("advisor", provider=provider) if provider else None
+    store = get_event_store() if incremental else None
+    docs = fetch_news(company, max_articles=max_articles, debug=debug, debug_logs=debug_logs, store=store,
+                      start_date=start_date, end_date=end_date)
+    if retrieval:
+        docs = select_passages(company, docs, debug_logs=debug_logs if debug else None)
+    extract = partial(extract_events_concurrent if concurrent else extract_events, llm=analyst_llm)
+    if incremental:
+        analyst_output, analyst_debug = analyze_incremental(company, docs, store, extract=extract, debug=debug)
+    else:
+        analyst_output, analyst_debug = extract(company, docs, debug=debug)
+    debug_logs.update(analyst_debug)
+    analyst_output = deduplicate(analyst_output, debug_logs, debug=debug)
+    record_events(company, analyst_output.events)
+    advisor_output, advisor_debug = get_advisor_output(company, analyst_output.events, debug=debug, llm=advisor_llm)
+    debug_logs.update(advisor_debug)
+    return analyst_output, advisor_output, debug_logs
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 ANALYST_PROMPT = """
 Analyze the following news articles about {company}. 
 Extract a list of unique, significant events directly supported by the articles, such as business deals, pipeline updates, or other relevant news.
@@ -61,3 +63,40 @@ END EVENTS.
 
 Output ONLY the JSON object and nothing else.
 """
+
+ANALYST_CONTINUE_PROMPT = """
+{prompt}
+
+Your previous answer was cut off. These events were already extracted and MUST NOT be repeated:
+{titles}
+
+Return EXACTLY and ONLY a single valid JSON object {{"events": [...]}} with the remaining events, using the same structure and rules.
+If no events remain, return {{"events": []}}.
+"""
+
+ADVISOR_COMPLETE_PROMPT = """
+{prompt}
+
+Your previous answer was incomplete. These fields are already done:
+{partial_json}
+
+Return EXACTLY and ONLY a single valid JSON object containing just these missing fields: {missing_fields}.
+"""
+
+ADVISOR_DIGEST_PROMPT = """
+You are a biotech business analyst. Condense the following {event_type} events for {company} into one factual digest of at most {max_words} words.
+Keep every deal value, partner, product, indication, development stage and date that matters; merge events that describe the same thing.
+Return ONLY the digest as plain text, with no JSON, markdown or preamble.
+
+BEGIN DIGEST EVENTS:
+{events_json}
+END DIGEST EVENTS.
+"""
+
+
+@lru_cache(maxsize=None)
+def get_template(template: str):
+    # One ChatPromptTemplate per template text, shared by every call; langchain_core.prompts
+    # (which pulls in langsmith) is only imported the first time a prompt is built
+    from langchain_core.prompts import ChatPromptTemplate
+    return ChatPromptTemplate.from_template(template)
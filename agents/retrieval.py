@@ -0,0 +1,191 @@
+import os
+import re
+import json
+import math
+import hashlib
+from collections import Counter, defaultdict
+from typing import List
+from langchain_core.documents import Document
+from agents.tokens import count_tokens
+
+# Offline BM25 retrieval: chunk articles into passages and keep only the ones relevant to
+# deals, pipeline and competitors, so the analyst prompt stays within a fixed token budget.
+
+INDEX_DIR = os.getenv("MARKET_PULSE_INDEX_DIR", ".cache/retrieval")
+PASSAGE_TOKENS = int(os.getenv("RETRIEVAL_PASSAGE_TOKENS", "200"))
+TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "12"))
+TOKEN_BUDGET = int(os.getenv("RETRIEVAL_TOKEN_BUDGET", "3000"))
+MAX_INDEXES = int(os.getenv("RETRIEVAL_MAX_INDEXES", "64"))  # persisted indexes kept, least recently used dropped
+
+DEFAULT_QUERY = (
+    "deal acquisition acquire acquired merger agreement license licensing partnership collaboration "
+    "upfront milestone milestones royalties billion million financing raises funding series "
+    "pipeline phase trial trials data results approval fda ema regulatory filing launch "
+    "candidate drug therapy asset indication mechanism competitor competitors rival competing market"
+)
+
+_WORD = re.compile(r"[a-z0-9$]+")
+_STOPWORDS = set(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [w for w in _WORD.findall(text.lower()) if w not in _STOPWORDS]
+
+
+def chunk_documents(docs: List[Document], passage_tokens=PASSAGE_TOKENS) -> List[Document]:
+    # Paragraph-aligned passages of roughly passage_tokens tokens, tagged with their position
+    passages = []
+    for doc_id, doc in enumerate(docs):
+        paragraphs = [p.strip() for p in doc.page_content.split("\n") if p.strip()]
+        current, current_tokens = [], 0
+        chunks = []
+        for para in paragraphs:
+            para_tokens = count_tokens(para)
+            if current and current_tokens + para_tokens > passage_tokens:
+                chunks.append("\n".join(current))
+                current, current_tokens = [], 0
+            current.append(para)
+            current_tokens += para_tokens
+        if current:
+            chunks.append("\n".join(current))
+        for chunk_id, chunk in enumerate(chunks):
+            passages.append(Document(
+                page_content=chunk,
+                metadata={**doc.metadata, "doc_id": doc_id, "chunk_id": chunk_id},
+            ))
+    return passages
+
+
+class BM25Index:
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}   # term -> {passage index: term frequency}
+        self.lengths = []
+        self.avg_length = 0.0
+
+    @classmethod
+    def build(cls, texts: List[str], **kwargs):
+        index = cls(**kwargs)
+        postings = defaultdict(dict)
+        for i, text in enumerate(texts):
+            terms = tokenize(text)
+            index.lengths.append(len(terms))
+            for term, tf in Counter(terms).items():
+                postings[term][i] = tf
+        index.postings = dict(postings)
+        index.avg_length = sum(index.lengths) / max(len(index.lengths), 1)
+        return index
+
+    def score(self, query: str) -> List[float]:
+        n = len(self.lengths)
+        scores = [0.0] * n
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for i, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[i] / (self.avg_length or 1))
+                scores[i] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({
+                "k1": self.k1, "b": self.b, "lengths": self.lengths,
+                "postings": {t: {str(i): tf for i, tf in p.items()} for t, p in self.postings.items()},
+            }, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r") as f:
+            data = json.load(f)
+        index = cls(k1=data["k1"], b=data["b"])
+        index.lengths = data["lengths"]
+        index.postings = {t: {int(i): tf for i, tf in p.items()} for t, p in data["postings"].items()}
+        index.avg_length = sum(index.lengths) / max(len(index.lengths), 1)
+        return index
+
+
+def _corpus_key(passages: List[Document]) -> str:
+    digest = hashlib.sha256()
+    for p in passages:
+        digest.update(p.page_content.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def get_index(passages: List[Document], index_dir=INDEX_DIR, max_indexes=MAX_INDEXES) -> BM25Index:
+    # Indexes are persisted per corpus content, so an unchanged archive is never re-indexed
+    path = os.path.join(index_dir, f"bm25_{_corpus_key(passages)}.json") if index_dir else None
+    if path and os.path.exists(path):
+        try:
+            index = BM25Index.load(path)
+            os.utime(path)  # mark as recently used
+            return index
+        except OSError:
+            pass  # pruned by another process meanwhile: rebuild it
+    index = BM25Index.build([f"{p.metadata.get('title', '')}\n{p.page_content}" for p in passages])
+    if path:
+        index.save(path)
+        prune_indexes(index_dir, max_indexes)
+    return index
+
+
+def prune_indexes(index_dir=INDEX_DIR, max_indexes=MAX_INDEXES) -> int:
+    # Every new article set adds an index file: keep the max_indexes most recently used ones
+    paths = [
+        os.path.join(index_dir, name) for name in os.listdir(index_dir)
+        if name.startswith("bm25_") and name.endswith(".json")
+    ]
+    removed = 0
+    for path in sorted(paths, key=_mtime, reverse=True)[max(max_indexes, 1):]:
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def _mtime(path) -> float:
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0.0
+
+
+def select_passages(company, docs: List[Document], top_k=TOP_K, token_budget=TOKEN_BUDGET,
+                    query=DEFAULT_QUERY, index_dir=INDEX_DIR, debug_logs=None) -> List[Document]:
+    """Return one Document per article holding only its top-ranked passages, in reading order."""
+    passages = chunk_documents(docs)
+    if not passages:
+        return []
+    index = get_index(passages, index_dir=index_dir)
+    scores = index.score(f"{company} {query}")
+    ranked = sorted(range(len(passages)), key=lambda i: scores[i], reverse=True)
+
+    selected, used = [], 0
+    for i in ranked[:top_k]:
+        tokens = count_tokens(passages[i].page_content)
+        if selected and used + tokens > token_budget:
+            continue
+        selected.append(i)
+        used += tokens
+
+    # Regroup by article so titles/URLs appear once in the analyst context
+    by_doc = defaultdict(list)
+    for i in sorted(selected, key=lambda i: (passages[i].metadata["doc_id"], passages[i].metadata["chunk_id"])):
+        by_doc[passages[i].metadata["doc_id"]].append(passages[i].page_content)
+    results = []
+    for doc_id, chunks in by_doc.items():
+        results.append(Document(page_content="\n[...]\n".join(chunks), metadata=dict(docs[doc_id].metadata)))
+    if debug_logs is not None:
+        debug_logs["Retrieval"] = f"{len(selected)}/{len(passages)} passages, ~{used} tokens"
+    return results
@@ -0,0 +1,99 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from typing import List
+from langchain_core.documents import Document
+from agents.analyst import Event
+
+# Per-company record of processed articles (URL + content hash) and the events extracted from them
+STORE_PATH = os.getenv("MARKET_PULSE_STORE_PATH", ".cache/event_store.sqlite")
+
+
+def content_hash(doc: Document) -> str:
+    payload = json.dumps([doc.metadata.get("title", ""), doc.metadata.get("date", ""), doc.page_content])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class EventStore:
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS articles ("
+            "  company TEXT NOT NULL, url TEXT NOT NULL, content_hash TEXT NOT NULL,"
+            "  processed_at REAL NOT NULL, PRIMARY KEY (company, url));"
+            "CREATE TABLE IF NOT EXISTS events ("
+            "  company TEXT NOT NULL, url TEXT NOT NULL, position INTEGER NOT NULL, event TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS idx_events_company ON events(company, url);"
+        )
+        self._conn.commit()
+
+    def filter_new(self, company, docs: List[Document]) -> List[Document]:
+        # Keep documents whose URL was never processed or whose content changed since
+        with self._lock:
+            known = dict(self._conn.execute(
+                "SELECT url, content_hash FROM articles WHERE company = ?", (company,)
+            ).fetchall())
+        return [
+            doc for doc in docs
+            if known.get(doc.metadata.get("url", "")) != doc.metadata.get("content_hash", content_hash(doc))
+        ]
+
+    def update(self, company, docs: List[Document], events: List[Event]):
+        # Replace the events of every re-processed article and record its content hash.
+        # Events are filed under the processed article they came from, never under another
+        # stored article: one whose source_url is not in `docs` goes to the first document.
+        now = time.time()
+        urls = [doc.metadata.get("url", "") for doc in docs]
+        known = set(urls)
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM events WHERE company = ? AND url = ?", [(company, u) for u in known]
+            )
+            self._conn.executemany(
+                "INSERT INTO events (company, url, position, event) VALUES (?, ?, ?, ?)",
+                [
+                    (company, ev.source_url if ev.source_url in known else urls[0], i, ev.json())
+                    for i, ev in enumerate(events)
+                ] if urls else [],
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO articles (company, url, content_hash, processed_at) VALUES (?, ?, ?, ?)",
+                [
+                    (company, doc.metadata.get("url", ""), doc.metadata.get("content_hash", content_hash(doc)), now)
+                    for doc in docs
+                ],
+            )
+            self._conn.commit()
+
+    def events(self, company, exclude_urls=()) -> List[Event]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url, event FROM events WHERE company = ? ORDER BY rowid", (company,)
+            ).fetchall()
+        excluded = set(exclude_urls)
+        return [Event.parse_raw(event) for url, event in rows if url not in excluded]
+
+    def forget(self, company):
+        with self._lock:
+            self._conn.execute("DELETE FROM events WHERE company = ?", (company,))
+            self._conn.execute("DELETE FROM articles WHERE company = ?", (company,))
+            self._conn.commit()
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def get_event_store() -> EventStore:
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = EventStore()
+        return _default_store
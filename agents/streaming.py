@@ -0,0 +1,81 @@
+import json
+from typing import Iterator, List
+
+# Incremental parser for the analyst's {"events": [...]} JSON, fed token chunks as they stream in.
+# Each object of the array is emitted as soon as its closing brace arrives.
+
+class EventArrayParser:
+    def __init__(self, key="events"):
+        self.key = key
+        self.buffer = ""
+        self.pos = 0            # next character of buffer to scan
+        self.in_array = False   # inside the target array
+        self.depth = 0          # brace depth inside the current array item
+        self.start = None       # buffer index where the current item started
+        self.in_string = False
+        self.escape = False
+
+    def _find_array(self):
+        # Locate `"events"` followed by `[`, ignoring whitespace and the colon
+        idx = self.buffer.find(f'"{self.key}"', self.pos)
+        if idx < 0:
+            return False
+        i = idx + len(self.key) + 2
+        while i < len(self.buffer) and self.buffer[i] in " \t\r\n:":
+            i += 1
+        if i >= len(self.buffer):
+            return False  # wait for more input
+        if self.buffer[i] != "[":
+            self.pos = i
+            return False
+        self.pos = i + 1
+        self.in_array = True
+        return True
+
+    def feed(self, chunk: str) -> List[dict]:
+        self.buffer += chunk
+        items = []
+        if not self.in_array and not self._find_array():
+            return items
+        buf = self.buffer
+        i = self.pos
+        while i < len(buf):
+            c = buf[i]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif c == "\\":
+                    self.escape = True
+                elif c == '"':
+                    self.in_string = False
+            elif c == '"':
+                self.in_string = True
+            elif c == "{":
+                if self.depth == 0:
+                    self.start = i
+                self.depth += 1
+            elif c == "}":
+                self.depth -= 1
+                if self.depth == 0 and self.start is not None:
+                    try:
+                        items.append(json.loads(buf[self.start:i + 1]))
+                    except json.JSONDecodeError:
+                        pass  # malformed item: skip it, keep streaming the rest
+                    self.start = None
+            elif c == "]" and self.depth == 0:
+                self.in_array = False
+                i += 1
+                break
+            i += 1
+        self.pos = i
+        # Drop consumed text so long streams don't rescan or keep the whole completion twice
+        if self.start is None:
+            self.buffer = buf[self.pos:]
+            self.pos = 0
+        return items
+
+
+def iter_json_items(chunks: Iterator[str], key="events") -> Iterator[dict]:
+    parser = EventArrayParser(key=key)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
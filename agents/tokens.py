@@ -0,0 +1,49 @@
+import logging
+from functools import lru_cache
+
+# Token counting for prompt budgets (tiktoken when available, ~4 chars/token otherwise)
+DEFAULT_ENCODING = "o200k_base"  # gpt-4o family
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=4)
+def _load_encoding(name):
+    # (encoding, None) or (None, why it is unavailable); failures are logged once per encoding
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(name), None
+    except Exception as e:
+        logger.warning("tiktoken encoding %s unavailable (%s: %s); token budgets use ~4 chars/token",
+                       name, type(e).__name__, e)
+        return None, type(e).__name__
+
+
+def _get_encoding(name):
+    return _load_encoding(name)[0]
+
+
+def tokenizer_name(encoding=DEFAULT_ENCODING) -> str:
+    # What count_tokens/truncate_tokens actually use, for debug output
+    reason = _load_encoding(encoding)[1]
+    return encoding if reason is None else f"~4 chars/token (tiktoken unavailable: {reason})"
+
+
+def count_tokens(text: str, encoding=DEFAULT_ENCODING) -> int:
+    enc = _get_encoding(encoding)
+    if enc is None:
+        return (len(text) + 3) // 4
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, max_tokens: int, encoding=DEFAULT_ENCODING, suffix="…") -> str:
+    # Cut `text` to at most max_tokens tokens, marking the cut with `suffix`
+    enc = _get_encoding(encoding)
+    if enc is None:
+        if len(text) <= max_tokens * 4:
+            return text
+        return text[:max(0, max_tokens * 4 - len(suffix))].rstrip() + suffix
+    tokens = enc.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return enc.decode(tokens[:max(0, max_tokens - 1)]).rstrip() + suffix
@@ -0,0 +1,205 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import inspect
+import functools
+import threading
+import contextvars
+from collections import deque, defaultdict
+from contextlib import contextmanager
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Lightweight in-process tracing: one span per pipeline stage call, with wall time, tokens,
+# retries, parse errors and cache hits. Spans go to an in-memory collector (Prometheus text
+# export) and, when MARKET_PULSE_TRACE_FILE is set, to an NDJSON trace file.
+
+TRACE_FILE = os.getenv("MARKET_PULSE_TRACE_FILE")
+MAX_SPANS = int(os.getenv("MARKET_PULSE_MAX_SPANS", "10000"))
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10, 30, 60, 120)
+COUNTERS = (
+    "prompt_tokens", "completion_tokens", "retries", "parse_errors", "repair_calls", "cache_hits", "cache_misses",
+)
+
+_current_span = contextvars.ContextVar("market_pulse_span", default=None)
+
+
+class TraceCollector:
+    def __init__(self, trace_file=TRACE_FILE, max_spans=MAX_SPANS):
+        self.trace_file = trace_file
+        self.spans = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+        self._metrics = defaultdict(lambda: defaultdict(float))   # (stage, company) -> name -> value
+        self._buckets = defaultdict(lambda: [0] * len(LATENCY_BUCKETS))
+
+    def record(self, span):
+        key = (span["stage"], span.get("company") or "")
+        with self._lock:
+            self.spans.append(span)
+            metrics = self._metrics[key]
+            metrics["calls"] += 1
+            metrics["seconds"] += span["wall_time"]
+            metrics["errors"] += 1 if span.get("error") else 0
+            for name in COUNTERS:
+                metrics[name] += span.get(name, 0)
+            buckets = self._buckets[key]
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if span["wall_time"] <= bound:
+                    buckets[i] += 1
+            if self.trace_file:
+                os.makedirs(os.path.dirname(os.path.abspath(self.trace_file)), exist_ok=True)
+                with open(self.trace_file, "a") as f:
+                    f.write(json.dumps(span, ensure_ascii=False, default=str) + "\n")
+
+    def trace(self, trace_id):
+        with self._lock:
+            return [s for s in self.spans if s["trace_id"] == trace_id]
+
+    def recent(self, since, company=None):
+        with self._lock:
+            return [s for s in self.spans if s["start"] >= since and (company is None or s["company"] == company)]
+
+    def to_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            items = sorted(self._metrics.items())
+            buckets = {k: list(v) for k, v in self._buckets.items()}
+
+        def label(stage, company):
+            return f'stage="{_escape_label(stage)}",company="{_escape_label(company)}"'
+
+        lines += ["# HELP market_pulse_stage_seconds Wall time per pipeline stage call.",
+                  "# TYPE market_pulse_stage_seconds histogram"]
+        for (stage, company), metrics in items:
+            for bound, count in zip(LATENCY_BUCKETS, buckets[(stage, company)]):
+                lines.append(f'market_pulse_stage_seconds_bucket{{{label(stage, company)},le="{bound}"}} {count}')
+            lines.append(f'market_pulse_stage_seconds_bucket{{{label(stage, company)},le="+Inf"}} {int(metrics["calls"])}')
+            lines.append(f'market_pulse_stage_seconds_sum{{{label(stage, company)}}} {metrics["seconds"]:.6f}')
+            lines.append(f'market_pulse_stage_seconds_count{{{label(stage, company)}}} {int(metrics["calls"])}')
+        for name in ("errors",) + COUNTERS:
+            lines += [f"# HELP market_pulse_{name}_total Total {name.replace('_', ' ')} per stage and company.",
+                      f"# TYPE market_pulse_{name}_total counter"]
+            for (stage, company), metrics in items:
+                lines.append(f"market_pulse_{name}_total{{{label(stage, company)}}} {int(metrics[name])}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        # Atomic write, suitable for the node_exporter textfile collector
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp, path)
+
+
+def _escape_label(value) -> str:
+    # Label values as the Prometheus exposition format requires (company names are user input)
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+collector = TraceCollector()
+
+
+@contextmanager
+def span(stage, company=None, **attributes):
+    parent = _current_span.get()
+    current = {
+        "trace_id": parent["trace_id"] if parent else uuid.uuid4().hex,
+        "span_id": uuid.uuid4().hex[:16],
+        "parent_id": parent["span_id"] if parent else None,
+        "stage": stage,
+        "company": company if company is not None else (parent or {}).get("company"),
+        "start": time.time(),
+        **{name: 0 for name in COUNTERS},
+        **attributes,
+    }
+    token = _current_span.set(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current["wall_time"] = time.perf_counter() - started
+        _current_span.reset(token)
+        collector.record(current)
+
+
+def current_span():
+    return _current_span.get()
+
+
+def record(**counts):
+    # Add counts (tokens, retries, cache hits...) to the innermost active span, if any
+    current = _current_span.get()
+    if current is not None:
+        for name, value in counts.items():
+            current[name] = current.get(name, 0) + value
+
+
+def traced(stage, company_arg="company"):
+    # Decorator opening a span around a function (sync, async or generator), labelled with its company argument
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        def company_of(args, kwargs):
+            try:
+                return signature.bind_partial(*args, **kwargs).arguments.get(company_arg)
+            except TypeError:
+                return None
+
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(stage, company=company_of(args, kwargs)):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def generator_wrapper(*args, **kwargs):
+                # The span stays open until the stream is exhausted or closed. Each step runs in a
+                # private context so the span is not current in the caller between items.
+                context = contextvars.copy_context()
+
+                def body():
+                    with span(stage, company=company_of(args, kwargs)):
+                        yield from fn(*args, **kwargs)
+
+                steps = body()
+                try:
+                    while True:
+                        try:
+                            item = context.run(next, steps)
+                        except StopIteration:
+                            return
+                        yield item
+                finally:
+                    context.run(steps.close)
+            return generator_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage, company=company_of(args, kwargs)):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    # LangChain callback feeding token usage of every LLM call into the active span
+    def on_llm_end(self, response, **kwargs):
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+        if not usage:
+            for generations in response.generations:
+                for g in generations:
+                    meta = getattr(getattr(g, "message", None), "usage_metadata", None) or {}
+                    prompt_tokens += meta.get("input_tokens", 0)
+                    completion_tokens += meta.get("output_tokens", 0)
+        record(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+
+tracing_handler = TracingCallbackHandler()
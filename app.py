@@ -1,41 +1,33 @@
-import io
+import time
+import threading
 import streamlit as st
 from datetime import datetime
-from gtts import gTTS
 from agents.crawler import fetch_news
-from agents.analyst import extract_events
-from agents.advisor import get_advisor_output
+from agents.analyst import AnalystOutput, stream_events
+from agents.advisor import stream_advisor_text, parse_advisor_text, complete_advisor_text
+from agents.pipeline import deduplicate, warm_up
+from agents.retrieval import select_passages
+from agents.llm import PROVIDERS, current_provider, get_llm
+from agents.tracing import collector
+from agents.audio import summary_audio, AUDIO_TIMEOUT
+from agents.columnar import encode_events, record_events
+from agents.jobs import FAILED, get_job_queue
 
 
+JOB_POLL_SECONDS = 1.0
+
 EMOJI_MAP = {
     "deal": "🤝",
     "pipeline": "🧬",
     "other": "📰"
 }
 
+REPORT_COLUMNS = ("type", "title", "date", "partners", "deal_value", "product_name", "indication",
+                  "development_stage", "status", "mechanism_of_action", "competitors")
+
 def advisor_report_to_markdown(advisor_output, company, events, report_date):
     takeaways = "\n".join(f"- {k}" for k in advisor_output.key_takeaways)
     recos = "\n".join(f"- {k}" for k in advisor_output.recommendations)
-    event_table = (
-        "| Type | Title | Date | Partners | Value | Product | Indication | Stage | Status | MOA | Competitors |\n"
-        "|---|---|---|---|---|---|---|---|---|---|---|\n"
-    )
-    for ev in events:
-        event_table += "|"
-        event_table += " | ".join([
-            str(ev.type or ""),
-            str(ev.title or ""),
-            str(ev.date or ""),
-            str(ev.partners or ""),
-            str(ev.deal_value or ""),
-            str(ev.product_name or ""),
-            str(ev.indication or ""),
-            str(ev.development_stage or ""),
-            str(ev.status or ""),
-            str(ev.mechanism_of_action or ""),
-            str(ev.competitors or "")
-        ])
-        event_table += "|\n"
     md = (
         f"# Advisor Report: {company}\n\n"
         f"**Date**: {report_date}\n\n"
@@ -45,7 +37,7 @@ def advisor_report_to_markdown(advisor_output, company, events, report_date):
         f"## 🏅 Key Takeaways\n"
         f"{takeaways}\n\n"
         f"## ✨ Extracted Events\n"
-        f"{event_table}\n"
+        f"{encode_events(events).to_markdown(REPORT_COLUMNS)}\n"
         f"## ⚠️ Risks & 💡 Opportunities\n"
         f"**Risks:** {advisor_output.risks_and_opportunities['risks']}\n\n"
         f"**Opportunities:** {advisor_output.risks_and_opportunities['opportunities']}\n\n"
@@ -56,22 +48,40 @@ def advisor_report_to_markdown(advisor_output, company, events, report_date):
     )
     return md
 
-def generate_audio_summary(advisor_output, company, report_date, lang="en"):
-    summary_text = (
-        f"Advisor Report for {company}, dated {report_date}. "
-        f"Google Trends Score: {advisor_output.google_trends} out of 100. "
-        f"Key insights: {advisor_output.key_insights}. "
-        f"Main takeaways: {', '.join(advisor_output.key_takeaways)}. "
-        f"Risks: {advisor_output.risks_and_opportunities['risks']}. "
-        f"Opportunities: {advisor_output.risks_and_opportunities['opportunities']}. "
-        f"Recommendations: {', '.join(advisor_output.recommendations)}. "
-        f"Conclusion: {advisor_output.conclusion}"
+EVENT_CARD_COLOR = "#e0c3fc"
+
+def render_event_card(ev):
+    emoji = EMOJI_MAP.get(ev.type, "💡")
+    card_color = EVENT_CARD_COLOR
+    li_items = []
+    if ev.type: li_items.append(f"<li><b>Type:</b> {ev.type.capitalize()}</li>")
+    if ev.partners: li_items.append(f"<li><b>Partners:</b> {ev.partners}</li>")
+    if ev.deal_value: li_items.append(f"<li><b>Value:</b> {ev.deal_value}</li>")
+    if ev.product_name: li_items.append(f"<li><b>Product:</b> {ev.product_name}</li>")
+    if ev.indication: li_items.append(f"<li><b>Indication:</b> {ev.indication}</li>")
+    if ev.development_stage: li_items.append(f"<li><b>Stage:</b> {ev.development_stage}</li>")
+    if ev.status: li_items.append(f"<li><b>Status:</b> {ev.status}</li>")
+    if ev.mechanism_of_action: li_items.append(f"<li><b>MOA:</b> {ev.mechanism_of_action}</li>")
+    if ev.competitors: li_items.append(f"<li><b>Competitors:</b> {ev.competitors}</li>")
+    ul_html = f"<ul style='padding-left:1.2em;color:#111;'>{''.join(li_items)}</ul>"
+    summary_html = f"<div style='margin-top:0.7em;font-size:0.97em;color:#111;'>{ev.summary}</div>"
+    source_urls = ev.source_urls or ([ev.source_url] if getattr(ev, "source_url", None) else [])
+    source_html = "".join(
+        f"<div style='margin-top:0.7em;font-size:0.9em;color:#3371c2;'>"
+        f"🔗 Source: <a href='{url}' target='_blank' style='color:#3371c2;text-decoration:underline'>{url}</a>"
+        f"</div>" for url in source_urls
+    )
+    st.markdown(
+        f"""
+        <div style="background:{card_color};padding:1.2rem 1rem 1rem 1rem;border-radius:18px;box-shadow:0 2px 8px #0001;margin-bottom:1.2rem;color:#111;">
+            <h3 style="margin-bottom:0.3rem;color:#111;">{emoji} {ev.title}</h3>
+            <span style="font-size:0.9em;color:#222;">{ev.date or ''}</span>
+            {ul_html}
+            {summary_html}
+            {source_html}
+        </div>
+        """, unsafe_allow_html=True
     )
-    tts = gTTS(text=summary_text, lang=lang)
-    mp3_fp = io.BytesIO()
-    tts.write_to_fp(mp3_fp)
-    mp3_fp.seek(0)
-    return mp3_fp
 
 st.set_page_config(page_title="Market Pulse", page_icon="🩺", layout="wide")
 st.title("Market Pulse 🚀")
@@ -80,10 +90,56 @@ with st.sidebar:
     st.header("Settings")
     company = st.text_input("🔎 Enter company name", value="GSK")
     debug = st.checkbox("Debug mode", value=True)
+    providers = sorted(PROVIDERS)
+    provider = st.selectbox(
+        "LLM provider", providers,
+        index=providers.index(current_provider()) if current_provider() in providers else 0,
+    )
+    concurrent = st.checkbox("Concurrent extraction (one LLM call per article)", value=False)
+    incremental = st.checkbox("Incremental (only analyze new articles)", value=False)
+    retrieval = st.checkbox("Retrieval (send only the most relevant passages)", value=False)
+    streaming = st.checkbox(
+        "Streaming (show events as they are generated)", value=False,
+        help="Streams the full article set; ignores the concurrent and incremental options."
+    )
+
+@st.cache_resource(show_spinner=False)
+def start_warm_up(provider):
+    # Once per server process and provider, off the script thread, so reruns never rebuild
+    # clients or templates and the first run does not pay for the LangChain imports
+    thread = threading.Thread(target=warm_up, args=(provider,), daemon=True)
+    thread.start()
+    return thread
+
+start_warm_up(provider)
+
+run_clicked = st.button("Run Market Pulse")
+if run_clicked and not streaming:
+    # Runs go through the shared job queue: the script thread only polls, and sessions asking
+    # for the same company and options while a run is in flight share it
+    job = get_job_queue().submit(
+        company, max_articles=3, concurrent=concurrent, incremental=incremental, retrieval=retrieval,
+        provider=provider,
+    )
+    st.session_state["job_id"] = job.id
+elif run_clicked:
+    st.session_state.pop("job_id", None)
+job = get_job_queue().get(st.session_state["job_id"]) if "job_id" in st.session_state else None
 
-if st.button("Run Market Pulse"):
-    debug_logs = {}
-    report_date = datetime.now().strftime("%Y-%m-%d %H:%M")
+if job is not None and not job.finished:
+    shared = f" (shared by {job.submissions} requests)" if job.submissions > 1 else ""
+    st.info(f"⏳ {job.company}: {job.status}{shared}…")
+    time.sleep(JOB_POLL_SECONDS)
+    st.rerun()
+
+if (run_clicked and streaming) or job is not None:
+    if job is not None:
+        company = job.company
+        run_started = job.started_at
+        report_date = datetime.fromtimestamp(job.submitted_at).strftime("%Y-%m-%d %H:%M")
+    else:
+        run_started = time.time()
+        report_date = datetime.now().strftime("%Y-%m-%d %H:%M")
 
     # st.markdown(f"<h2 style='color:#222;'>{company} <span style='font-size:0.6em;color:#666;'>({report_date})</span></h2>", unsafe_allow_html=True)
     st.markdown(
@@ -92,60 +148,59 @@ if st.button("Run Market Pulse"):
         unsafe_allow_html=True
     )
     
-    with st.spinner("📰 Fetching news..."):
-        docs = fetch_news(company, max_articles=3, debug=True, debug_logs=debug_logs)
-
-    with st.spinner("🧠 Extracting events..."):
-        analyst_output, analyst_debug = extract_events(company, docs, debug=debug)
-        debug_logs.update(analyst_debug)
+    if job is None:
+        # Streaming mode runs in the script thread: cards appear as soon as each event's JSON object closes
+        debug_logs = {}
+        analyst_llm = get_llm("analyst", provider=provider)
+        advisor_llm = get_llm("advisor", provider=provider)
+        with st.spinner("📰 Fetching news..."):
+            docs = fetch_news(company, max_articles=3, debug=True, debug_logs=debug_logs)
+            if retrieval:
+                docs = select_passages(company, docs, debug_logs=debug_logs)
 
-    with st.spinner("🦾 Report..."):
-        advisor_output, advisor_debug = get_advisor_output(company, analyst_output.events, debug=debug)
-        debug_logs.update(advisor_debug)
+        st.header("✨ Extracted Events")
+        cols = st.columns(2)
+        events = []
+        for ev in stream_events(company, docs, debug_info=debug_logs, llm=analyst_llm):
+            with cols[len(events) % 2]:
+                render_event_card(ev)
+            events.append(ev)
+        if not events:
+            st.info("No events found.")
+        events = deduplicate(AnalystOutput(events=events), debug_logs, debug=debug).events
+        record_events(company, events)
 
-    events = analyst_output.events
+        advisor_placeholder = st.empty()
+        advisor_text = ""
+        for chunk in stream_advisor_text(company, events, debug_info=debug_logs, llm=advisor_llm):
+            advisor_text += chunk
+            advisor_placeholder.code(advisor_text, language="json")
+        advisor_placeholder.empty()
+        advisor_output = parse_advisor_text(advisor_text)
+        if advisor_output is None:
+            advisor_output = complete_advisor_text(company, events, advisor_text, debug_info=debug_logs, llm=advisor_llm)
+        if debug:
+            debug_logs["Advisor Chain Result"] = str(advisor_output)
+    else:
+        if job.status == FAILED:
+            st.error(f"Market Pulse run failed: {job.error}")
+            analyst_output, advisor_output, debug_logs = AnalystOutput(events=[]), None, {"Job Error": job.error}
+        else:
+            analyst_output, advisor_output, job_logs = job.result
+            debug_logs = dict(job_logs)  # shared with other sessions polling the same job
 
-    # === Présentation principale ===
-    st.header("✨ Extracted Events")
-    EVENT_CARD_COLOR = "#e0c3fc"
+        events = analyst_output.events
 
-    if events:
-        cols = st.columns(2)
-        for i, ev in enumerate(events):
-            emoji = EMOJI_MAP.get(ev.type, "💡")
-            card_color = EVENT_CARD_COLOR
-            li_items = []
-            if ev.type: li_items.append(f"<li><b>Type:</b> {ev.type.capitalize()}</li>")
-            if ev.partners: li_items.append(f"<li><b>Partners:</b> {ev.partners}</li>")
-            if ev.deal_value: li_items.append(f"<li><b>Value:</b> {ev.deal_value}</li>")
-            if ev.product_name: li_items.append(f"<li><b>Product:</b> {ev.product_name}</li>")
-            if ev.indication: li_items.append(f"<li><b>Indication:</b> {ev.indication}</li>")
-            if ev.development_stage: li_items.append(f"<li><b>Stage:</b> {ev.development_stage}</li>")
-            if ev.status: li_items.append(f"<li><b>Status:</b> {ev.status}</li>")
-            if ev.mechanism_of_action: li_items.append(f"<li><b>MOA:</b> {ev.mechanism_of_action}</li>")
-            if ev.competitors: li_items.append(f"<li><b>Competitors:</b> {ev.competitors}</li>")
-            ul_html = f"<ul style='padding-left:1.2em;color:#111;'>{''.join(li_items)}</ul>"
-            summary_html = f"<div style='margin-top:0.7em;font-size:0.97em;color:#111;'>{ev.summary}</div>"
-            with cols[i % 2]:
-                source_html = (
-                    f"<div style='margin-top:0.7em;font-size:0.9em;color:#3371c2;'>"
-                    f"🔗 Source: <a href='{ev.source_url}' target='_blank' style='color:#3371c2;text-decoration:underline'>{ev.source_url}</a>"
-                    f"</div>" if getattr(ev, "source_url", None) else ""
-                )
-                st.markdown(
-                    f"""
-                    <div style="background:{card_color};padding:1.2rem 1rem 1rem 1rem;border-radius:18px;box-shadow:0 2px 8px #0001;margin-bottom:1.2rem;color:#111;">
-                        <h3 style="margin-bottom:0.3rem;color:#111;">{emoji} {ev.title}</h3>
-                        <span style="font-size:0.9em;color:#222;">{ev.date or ''}</span>
-                        {ul_html}
-                        {summary_html}
-                        {source_html}
-                    </div>
-                    """, unsafe_allow_html=True
-                )
+        # === Présentation principale ===
+        st.header("✨ Extracted Events")
 
-    else:
-        st.info("No events found.")
+        if events:
+            cols = st.columns(2)
+            for i, ev in enumerate(events):
+                with cols[i % 2]:
+                    render_event_card(ev)
+        else:
+            st.info("No events found.")
 
     # === Rapport business/présentation ===
     if advisor_output:
@@ -185,13 +240,36 @@ if st.button("Run Market Pulse"):
             file_name=f"{company}_advisor_report_{report_date.replace(' ','_').replace(':','-')}.md",
             mime="text/markdown"
         )
+        st.download_button(
+            label="⬇️ Download Events (CSV)",
+            data=encode_events(events, company).to_csv(),
+            file_name=f"{company}_events_{report_date.replace(' ','_').replace(':','-')}.csv",
+            mime="text/csv"
+        )
+        # Synthesized in the background (or read from the audio cache); filled in at the end of the page
+        audio_future, audio_mime = summary_audio(advisor_output, company, report_date, lang="en")
         with st.expander("🔊 Listen to Audio Summary", expanded=False):
-            audio_fp = generate_audio_summary(advisor_output, company, report_date, lang="en")
-            st.audio(audio_fp, format="audio/mp3")
+            audio_placeholder = st.empty()
+            audio_placeholder.caption("Generating audio…")
 
     # --- DEBUG INFO ---
     if debug:
+        debug_logs["Trace"] = "\n".join(
+            f"{s['stage']:<24} {s['wall_time'] * 1000:9.1f} ms  prompt={s['prompt_tokens']} "
+            f"completion={s['completion_tokens']} retries={s['retries']} parse_errors={s['parse_errors']} "
+            f"cache_hits={s['cache_hits']}" + (f"  ERROR {s['error']}" if s.get("error") else "")
+            for s in collector.recent(run_started, company=company)
+        )
+        debug_logs["Metrics (Prometheus)"] = collector.to_prometheus()
         with st.expander("DEBUG INFO", expanded=False):
             for k, v in debug_logs.items():
                 st.markdown(f"### {k}")
-                st.code(v if isinstance(v, str) else str(v))
\ No newline at end of file
+                st.code(v if isinstance(v, str) else str(v))
+
+    if advisor_output:
+        try:
+            audio_placeholder.audio(audio_future.result(timeout=AUDIO_TIMEOUT), format=audio_mime)
+        except TimeoutError:
+            audio_placeholder.warning(f"Audio summary unavailable: no audio after {AUDIO_TIMEOUT:.0f}s")
+        except Exception as e:
+            audio_placeholder.warning(f"Audio summary unavailable: {e}")
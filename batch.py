@@ -0,0 +1,121 @@
+import os
+import sys
+import json
+import argparse
+import threading
+import traceback
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from agents.pipeline import run_market_pulse
+from agents.tracing import collector
+
+# Watchlist runner: Market Pulse for many companies, one JSONL record per company.
+# The output file doubles as the checkpoint: companies already written with status "ok" are skipped.
+
+def load_watchlist(companies=None, watchlist_file=None):
+    names = list(companies or [])
+    if watchlist_file:
+        with open(watchlist_file, "r") as f:
+            names += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    # Keep order, drop duplicates
+    return list(dict.fromkeys(names))
+
+def load_checkpoint(output_path):
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "r") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # partial line from a crash mid-write
+            if record.get("status") == "ok":
+                done.add(record["company"])
+    return done
+
+def run_company(company, max_articles=3, concurrent=False, incremental=False, retrieval=False,
+                start_date=None, end_date=None):
+    started = datetime.now()
+    try:
+        analyst_output, advisor_output, debug_logs = run_market_pulse(
+            company, max_articles=max_articles, concurrent=concurrent, incremental=incremental,
+            retrieval=retrieval, start_date=start_date, end_date=end_date, debug=True
+        )
+        errors = {k: v for k, v in debug_logs.items() if "Error" in k}
+        # A failed analyst call still yields an advisor report (over no events): retry it on resume
+        analyst_failed = any(k.startswith("Analyst") for k in errors)
+        return {
+            "company": company,
+            "status": "ok" if advisor_output is not None and not analyst_failed else "failed",
+            "started_at": started.isoformat(timespec="seconds"),
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            "analyst": analyst_output.dict(),
+            "advisor": advisor_output.dict() if advisor_output is not None else None,
+            "errors": errors,
+        }
+    except Exception as e:
+        return {
+            "company": company,
+            "status": "failed",
+            "started_at": started.isoformat(timespec="seconds"),
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            "analyst": None,
+            "advisor": None,
+            "errors": {"Exception": "".join(traceback.format_exception_only(type(e), e)).strip()},
+        }
+
+def run_watchlist(companies, output_path, workers=4, max_articles=3, concurrent=False, incremental=False,
+                  retrieval=False, start_date=None, end_date=None, resume=True):
+    done = load_checkpoint(output_path) if resume else set()
+    todo = [c for c in companies if c not in done]
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    write_lock = threading.Lock()
+    summary = {"skipped": len(companies) - len(todo), "ok": 0, "failed": 0}
+
+    with open(output_path, "a") as out, ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_company, c, max_articles, concurrent, incremental, retrieval, start_date, end_date): c for c in todo}
+        for future in as_completed(futures):
+            record = future.result()
+            with write_lock:
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                os.fsync(out.fileno())
+            summary[record["status"]] += 1
+            print(f"[{record['status']}] {record['company']}", file=sys.stderr)
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run Market Pulse for a watchlist of companies.")
+    parser.add_argument("companies", nargs="*", help="Company names")
+    parser.add_argument("-f", "--file", help="Watchlist file, one company per line")
+    parser.add_argument("-o", "--output", default="output/watchlist.jsonl", help="JSONL output / checkpoint file")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="Companies processed in parallel")
+    parser.add_argument("--max-articles", type=int, default=3)
+    parser.add_argument("--concurrent", action="store_true", help="One analyst call per article")
+    parser.add_argument("--incremental", action="store_true", help="Only send new/changed articles to the LLM")
+    parser.add_argument("--retrieval", action="store_true", help="Send only the top-ranked passages to the analyst")
+    parser.add_argument("--since", help="Only articles on or after this date (YYYY-MM-DD, archive only)")
+    parser.add_argument("--until", help="Only articles on or before this date (YYYY-MM-DD, archive only)")
+    parser.add_argument("--trace", help="Append per-stage spans to this NDJSON file")
+    parser.add_argument("--metrics", help="Write Prometheus text metrics to this file when done")
+    parser.add_argument("--no-resume", action="store_true", help="Ignore the checkpoint and rerun everything")
+    args = parser.parse_args(argv)
+
+    companies = load_watchlist(args.companies, args.file)
+    if not companies:
+        parser.error("no companies given")
+    if args.trace:
+        collector.trace_file = args.trace
+    summary = run_watchlist(
+        companies, args.output, workers=args.workers, max_articles=args.max_articles,
+        concurrent=args.concurrent, incremental=args.incremental, retrieval=args.retrieval,
+        start_date=args.since, end_date=args.until, resume=not args.no_resume,
+    )
+    print(json.dumps(summary), file=sys.stderr)
+    if args.metrics:
+        collector.write_prometheus(args.metrics)
+    return 0 if summary["failed"] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+import os
+import sys
+import json
+import glob
+import time
+import random
+import argparse
+import platform
+import statistics
+import tracemalloc
+from datetime import datetime
+from langchain_core.callbacks import BaseCallbackHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.crawler import fetch_news
+from agents.analyst import docs_to_context, extract_events, extract_events_concurrent
+from agents.advisor import get_advisor_output
+from agents.fake_llm import FakeChatModel
+from agents.tokens import count_tokens
+
+# End-to-end benchmark of crawl → analyst → advisor against the deterministic fake LLM.
+# Usage: python -m benchmarks.bench_pipeline --sizes 10,100,1000 --latency 0.2 [--compare old.json]
+
+COMPANY = "BenchCo"
+DATA_GLOB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "*.txt")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+class TokenCounter(BaseCallbackHandler):
+    # Counts prompt/completion tokens with the real tokenizer for every LLM call
+    def __init__(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.calls += 1
+        self.prompt_tokens += sum(count_tokens(str(m.content)) for batch in messages for m in batch)
+
+    def on_llm_end(self, response, **kwargs):
+        for generations in response.generations:
+            for g in generations:
+                self.completion_tokens += count_tokens(g.text)
+
+
+def synthetic_corpus(n_articles, seed=0):
+    # Articles built from the data/*.txt samples with shuffled paragraphs and unique titles/URLs
+    rng = random.Random(seed)
+    samples = []
+    for path in sorted(glob.glob(DATA_GLOB)):
+        with open(path, "r") as f:
+            samples.append([p for p in f.read().split("\n") if p.strip()])
+    articles = []
+    for i in range(n_articles):
+        paragraphs = list(rng.choice(samples))
+        rng.shuffle(paragraphs)
+        articles.append({
+            "url": f"https://example.com/{COMPANY.lower()}/article-{i}",
+            "title": f"{COMPANY} news #{i}: {paragraphs[0][:60]}",
+            "date": f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}",
+            "content": "\n\n".join(paragraphs),
+        })
+    return {COMPANY: articles}
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    if len(samples) == 1:
+        return {"p50": samples[0], "p90": samples[0], "p99": samples[0], "mean": samples[0]}
+    q = statistics.quantiles(samples, n=100, method="inclusive")
+    return {"p50": q[49], "p90": q[89], "p99": q[98], "mean": statistics.fmean(samples)}
+
+
+def measure(fn, repeats):
+    # Wall time percentiles and peak traced memory across repeats; returns the last result too
+    times, peak, result = [], 0, None
+    for _ in range(repeats):
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return {"latency_s": percentiles(times), "peak_memory_bytes": peak}, result
+
+
+def run_size(n_articles, args):
+    news = synthetic_corpus(n_articles, seed=args.seed)
+    analyst_counter, advisor_counter = TokenCounter(), TokenCounter()
+    analyst_llm = FakeChatModel(
+        latency=args.latency, tokens_per_second=args.tps, truncate_rate=args.truncate_rate,
+        callbacks=[analyst_counter],
+    )
+    advisor_llm = FakeChatModel(latency=args.latency, tokens_per_second=args.tps, callbacks=[advisor_counter])
+    extract = extract_events_concurrent if args.concurrent else extract_events
+
+    stages = {}
+    stages["fetch_news"], docs = measure(
+        lambda: fetch_news(COMPANY, max_articles=n_articles, news=news), args.repeats
+    )
+    stages["docs_to_context"], context = measure(lambda: docs_to_context(docs), args.repeats)
+    stages["docs_to_context"]["context_tokens"] = count_tokens(context)
+
+    parse_errors = []
+    def run_extract():
+        output, debug_info = extract(COMPANY, docs, debug=True, llm=analyst_llm, use_cache=False)
+        parse_errors.append(sum("Parse Error" in k for k in debug_info))
+        return output
+    stages["extract_events"], analyst_output = measure(run_extract, args.repeats)
+    calls = analyst_counter.calls / args.repeats
+    stages["extract_events"].update({
+        "llm_calls": calls,
+        "prompt_tokens": analyst_counter.prompt_tokens / args.repeats,
+        "completion_tokens": analyst_counter.completion_tokens / args.repeats,
+        "parse_failure_rate": sum(parse_errors) / max(analyst_counter.calls, 1),
+        "events": len(analyst_output.events),
+    })
+
+    advisor_failures = []
+    def run_advisor():
+        output, debug_info = get_advisor_output(COMPANY, analyst_output.events, debug=True, llm=advisor_llm, use_cache=False)
+        advisor_failures.append(output is None)
+        return output
+    stages["get_advisor_output"], _ = measure(run_advisor, args.repeats)
+    stages["get_advisor_output"].update({
+        "llm_calls": advisor_counter.calls / args.repeats,
+        "prompt_tokens": advisor_counter.prompt_tokens / args.repeats,
+        "completion_tokens": advisor_counter.completion_tokens / args.repeats,
+        "parse_failure_rate": sum(advisor_failures) / len(advisor_failures),
+    })
+    return {"articles": n_articles, "stages": stages}
+
+
+def compare(current, baseline, threshold):
+    # Flag stages whose p50 latency or prompt tokens grew by more than `threshold` (relative)
+    regressions = []
+    old_runs = {r["articles"]: r for r in baseline["runs"]}
+    for run in current["runs"]:
+        old = old_runs.get(run["articles"])
+        if old is None:
+            continue
+        for stage, metrics in run["stages"].items():
+            old_metrics = old["stages"].get(stage, {})
+            pairs = [("latency_p50", metrics["latency_s"]["p50"], old_metrics.get("latency_s", {}).get("p50"))]
+            if "prompt_tokens" in metrics:
+                pairs.append(("prompt_tokens", metrics["prompt_tokens"], old_metrics.get("prompt_tokens")))
+            for name, new_value, old_value in pairs:
+                if old_value and new_value > old_value * (1 + threshold):
+                    regressions.append(f"{run['articles']} articles / {stage} / {name}: {old_value:.4g} → {new_value:.4g}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Market Pulse pipeline with a fake LLM.")
+    parser.add_argument("--sizes", default="10,100,1000", help="Comma-separated corpus sizes (articles)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake LLM time to first token (s)")
+    parser.add_argument("--tps", type=float, default=0.0, help="Fake LLM tokens/second (0 = instant)")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="Share of analyst calls answered with truncated JSON")
+    parser.add_argument("--concurrent", action="store_true", help="Benchmark extract_events_concurrent instead")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Result JSON path (default: benchmarks/results/bench_<timestamp>.json)")
+    parser.add_argument("--compare", help="Baseline result JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative regression threshold")
+    args = parser.parse_args(argv)
+
+    result = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "config": vars(args),
+        "runs": [],
+    }
+    for size in [int(s) for s in args.sizes.split(",") if s]:
+        run = run_size(size, args)
+        result["runs"].append(run)
+        for stage, metrics in run["stages"].items():
+            lat = metrics["latency_s"]
+            print(
+                f"{size:>6} articles  {stage:<20} p50={lat['p50'] * 1000:9.2f}ms  p90={lat['p90'] * 1000:9.2f}ms  "
+                f"peak={metrics['peak_memory_bytes'] / 1e6:7.2f}MB"
+                + (f"  prompt_tokens={metrics['prompt_tokens']:.0f}" if "prompt_tokens" in metrics else "")
+                + (f"  parse_fail={metrics['parse_failure_rate']:.1%}" if "parse_failure_rate" in metrics else "")
+            )
+
+    output = args.output or os.path.join(RESULTS_DIR, f"bench_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"Results saved to {output}")
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            regressions = compare(result, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
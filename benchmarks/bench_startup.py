@@ -0,0 +1,122 @@
+import os
+import sys
+import json
+import argparse
+import platform
+import statistics
+import subprocess
+from datetime import datetime
+
+# Cold-start benchmark: import time of the entry-point modules and first-use cost of the shared
+# resources (prompt templates, LLM client, tokenizer), each measured in a fresh interpreter.
+# Usage: python -m benchmarks.bench_startup [--repeats 5] [--compare old.json]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+IMPORTS = ("agents.analyst", "agents.advisor", "agents.pipeline", "agents.jobs", "batch", "streamlit")
+FIRST_USE = {
+    "get_template": "from agents.prompts import get_template, ANALYST_PROMPT as P\nrun = lambda: get_template(P)",
+    "get_llm_fake": "from agents.llm import get_llm\nrun = lambda: get_llm('analyst', provider='fake')",
+    "count_tokens": "from agents.tokens import count_tokens\nrun = lambda: count_tokens('warm up')",
+    "warm_up": "from agents.pipeline import warm_up\nrun = lambda: warm_up('fake')",
+}
+
+_IMPORT_PROBE = """
+import time, importlib
+started = time.perf_counter()
+importlib.import_module({module!r})
+print(time.perf_counter() - started)
+"""
+
+_FIRST_USE_PROBE = """
+import time
+{setup}
+started = time.perf_counter()
+run()
+first = time.perf_counter() - started
+started = time.perf_counter()
+run()
+print(first, time.perf_counter() - started)
+"""
+
+
+def probe(code):
+    # Seconds printed by `code` in a fresh interpreter, or None when it fails (e.g. not installed)
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return None
+    return [float(v) for v in proc.stdout.split()]
+
+
+def summarize(samples):
+    return {"p50": statistics.median(samples), "min": min(samples), "max": max(samples)}
+
+
+def run(repeats):
+    imports, first_use = {}, {}
+    for module in IMPORTS:
+        samples = [probe(_IMPORT_PROBE.format(module=module)) for _ in range(repeats)]
+        if all(samples):
+            imports[module] = summarize([s[0] for s in samples])
+    for name, setup in FIRST_USE.items():
+        samples = [probe(_FIRST_USE_PROBE.format(setup=setup)) for _ in range(repeats)]
+        if all(samples):
+            first_use[name] = {
+                "first": summarize([s[0] for s in samples]),
+                "cached": summarize([s[1] for s in samples]),
+            }
+    return {"imports": imports, "first_use": first_use}
+
+
+def compare(current, baseline, threshold, floor=0.01):
+    # Flag p50 timings that grew by more than `threshold` (relative) and `floor` seconds
+    regressions = []
+    pairs = [(f"import {m}", v["p50"], baseline["imports"].get(m, {}).get("p50")) for m, v in current["imports"].items()]
+    pairs += [
+        (f"first use {n}", v["first"]["p50"], baseline["first_use"].get(n, {}).get("first", {}).get("p50"))
+        for n, v in current["first_use"].items()
+    ]
+    for name, new_value, old_value in pairs:
+        if old_value and new_value > old_value * (1 + threshold) and new_value - old_value > floor:
+            regressions.append(f"{name}: {old_value * 1000:.1f}ms → {new_value * 1000:.1f}ms")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Market Pulse import and first-use latency.")
+    parser.add_argument("--repeats", type=int, default=5, help="Fresh interpreters per measurement")
+    parser.add_argument("--output", help="Result JSON path (default: benchmarks/results/startup_<timestamp>.json)")
+    parser.add_argument("--compare", help="Baseline result JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative regression threshold")
+    args = parser.parse_args(argv)
+
+    result = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "config": vars(args),
+        **run(args.repeats),
+    }
+    for module, timing in result["imports"].items():
+        print(f"import     {module:<18} p50={timing['p50'] * 1000:8.1f}ms  max={timing['max'] * 1000:8.1f}ms")
+    for name, timing in result["first_use"].items():
+        print(f"first use  {name:<18} p50={timing['first']['p50'] * 1000:8.1f}ms  "
+              f"cached={timing['cached']['p50'] * 1000:8.3f}ms")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"startup_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"Results saved to {output}")
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            regressions = compare(result, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+import json
+import pytest
+from agents.json_repair import loads_partial, recover_array_items, repair_json
+
+# (LLM output, parsed data, whether it was cut off)
+LOADS_PARTIAL_CASES = [
+    ('{"a": 1}', {"a": 1}, False),
+    ('```json\n{"a": 1}\n```', {"a": 1}, False),
+    ('Here is the JSON:\n{"a": 1}\nHope this helps.', {"a": 1}, False),
+    ('{"a": [1, 2,], "b": "x",}', {"a": [1, 2], "b": "x"}, False),
+    ('{"a": 1, // comment\n "b": 2}', {"a": 1, "b": 2}, False),
+    ('{"a": "}{][", "b": "say \\"hi\\""}', {"a": "}{][", "b": 'say "hi"'}, False),
+    # cut inside a string: the open member is dropped
+    ('{"a": "x", "b": "hel', {"a": "x"}, True),
+    ('{"a": "x", "b": "say \\"hi', {"a": "x"}, True),
+    # cut inside a number: "12" may have been "1234", so it is dropped too
+    ('{"a": "x", "b": 12', {"a": "x"}, True),
+    ('{"a": [1, 2, 3', {"a": [1, 2]}, True),
+    # cut right after a key or a comma
+    ('{"a": "x", "b":', {"a": "x"}, True),
+    ('{"a": {"r": "x"}, ', {"a": {"r": "x"}}, True),
+    # bare arrays
+    ('[{"a": 1}, {"b": 2}]', [{"a": 1}, {"b": 2}], False),
+    ('```json\n[{"a": 1},]\n```', [{"a": 1}], False),
+    ('[{"a": 1}, {"b": "x', [{"a": 1}, {}], True),
+]
+
+
+@pytest.mark.parametrize("text, expected, truncated", LOADS_PARTIAL_CASES)
+def test_loads_partial(text, expected, truncated):
+    assert loads_partial(text) == (expected, truncated)
+
+
+@pytest.mark.parametrize("text, expected, truncated", LOADS_PARTIAL_CASES)
+def test_repair_json_is_valid_json(text, expected, truncated):
+    assert json.loads(repair_json(text)) == expected
+
+
+# (LLM output, complete items of "events", whether the array was cut off)
+RECOVER_CASES = [
+    ('{"events": [{"t": 1}, {"t": 2}]}', [{"t": 1}, {"t": 2}], False),
+    ('```json\n{"events": [{"t": 1}]}\n```', [{"t": 1}], False),
+    ('{"events": [{"t": 1}, {"t": "cut', [{"t": 1}], True),
+    ('{"events": [{"t": 1}, {"t": 23', [{"t": 1}], True),
+    ('{"events": []}', [], False),
+    ('{"other": 1}', [], False),
+]
+
+
+@pytest.mark.parametrize("text, items, truncated", RECOVER_CASES)
+def test_recover_array_items(text, items, truncated):
+    assert recover_array_items(text) == (items, truncated)
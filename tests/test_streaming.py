@@ -0,0 +1,35 @@
+import pytest
+from agents.streaming import EventArrayParser, iter_json_items
+
+DOCUMENT = '{"events": [{"title": "a } ] {", "n": 1}, {"title": "say \\"hi\\"", "nested": {"k": [1]}}], "x": 2}'
+ITEMS = [{"title": "a } ] {", "n": 1}, {"title": 'say "hi"', "nested": {"k": [1]}}]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 16, len(DOCUMENT)])
+def test_items_split_across_chunks(chunk_size):
+    chunks = [DOCUMENT[i:i + chunk_size] for i in range(0, len(DOCUMENT), chunk_size)]
+    assert list(iter_json_items(chunks)) == ITEMS
+
+
+# (streamed text, items emitted, still inside the array)
+CASES = [
+    (DOCUMENT, ITEMS, False),
+    ('```json\n{"events": [{"t": 1}]}\n```', [{"t": 1}], False),
+    ('{"events" : \n [{"t": 1}]}', [{"t": 1}], False),
+    ('{"events": [{"t": 1}, {"t": "cut', [{"t": 1}], True),
+    ('{"events": [{"t": 1}, {"t": 12', [{"t": 1}], True),
+    ('{"events": [{"t": 1}, {"t": nope}, {"t": 3}]}', [{"t": 1}, {"t": 3}], False),  # malformed item skipped
+    ('{"summary": "no events here"}', [], False),
+]
+
+
+@pytest.mark.parametrize("text, items, in_array", CASES)
+def test_event_array_parser(text, items, in_array):
+    parser = EventArrayParser()
+    assert parser.feed(text) == items
+    assert parser.in_array is in_array
+
+
+def test_custom_key():
+    parser = EventArrayParser(key="items")
+    assert parser.feed('{"events": [{"t": 0}], "items": [{"t": 1}]}') == [{"t": 1}]